@@ -0,0 +1,84 @@
+"""Hull construction time of GrahamScan and QuickHull from 30 to 1e6 points.
+
+connect is the full method the track generator calls, TrackNode lists in
+and TrackEdge lists out. hull_indices is QuickHull on a coordinate array
+alone. Points are whole pixels uniform in the window, as generated track
+nodes are. Ties and collinear corners among those can make the two methods
+pick different loops, so they are checked against each other on points
+spread over a far wider range instead.
+
+    python -m bench.convex_hull --sizes 30 1000 100000 1000000
+"""
+
+import argparse
+import random
+import time
+from typing import Callable
+import numpy as np
+
+from src.tracks.convex_hull import GrahamScan, QuickHull
+from src.tracks.graph_structs import TrackNode
+
+
+def best_ms(function: Callable[[], object], repeats: int) -> float:
+    times: list[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def random_nodes(
+    rng: random.Random, num_points: int, width: int, height: int
+) -> list[TrackNode]:
+    return [
+        TrackNode(rng.randrange(width), rng.randrange(height))
+        for _ in range(num_points)
+    ]
+
+
+def run(num_points: int, repeats: int, seed: int) -> dict[str, float]:
+    rng = random.Random(seed)
+    # Practically free of ties and collinear points, and small enough for
+    # the int64 cross products of hull_indices
+    spread = random_nodes(rng, num_points, 10**9, 10**9)
+    graham = GrahamScan().connect(spread)
+    quick = QuickHull().connect(spread)
+    assert [(e.src, e.dst) for e in graham.convex_edges] == [
+        (e.src, e.dst) for e in quick.convex_edges
+    ]
+
+    nodes = random_nodes(rng, num_points, 1600, 900)
+    points = np.array([node.as_tuple() for node in nodes])
+    quick = QuickHull().connect(nodes)
+
+    return {
+        "points": num_points,
+        "hull": len(quick.convex_edges),
+        "graham_ms": best_ms(lambda: GrahamScan().connect(nodes), repeats),
+        "quick_ms": best_ms(lambda: QuickHull().connect(nodes), repeats),
+        "quick_array_ms": best_ms(lambda: QuickHull.hull_indices(points), repeats),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[30, 100, 1_000, 10_000, 100_000, 1_000_000],
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        result = run(size, args.repeats, args.seed)
+        print(
+            f"{result['points']:>8} points, {result['hull']:>3} on the hull:"
+            f" GrahamScan {result['graham_ms']:9.3f} ms,"
+            f" QuickHull {result['quick_ms']:9.3f} ms,"
+            f" on arrays {result['quick_array_ms']:8.3f} ms"
+        )
@@ -0,0 +1,227 @@
+"""Ticks per second of the simulation hot paths at fixed seeds.
+
+Cases, each at every population size:
+    car_update    Car.update of every car, one CarBatch.update per tick
+    collider      Collider.update, checkpoint gates and rays sphere traced
+                  through the distance field, the default sensor
+    handle_input  NeatAI.handle_input of every car, networks run in a batch
+    track         full Track construction, tracks per second, size ignored
+    generation    a headless eval_genomes generation, ticks per second
+
+Results go to a JSON file. Given a baseline file, every case slower than
+the baseline by more than the threshold is listed and the exit code is 1.
+
+    python -m bench.suite --output bench.json
+    python -m bench.suite --baseline bench.json --threshold 0.1
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+import numpy as np
+import neat
+
+from src.contexts.context import Constants
+from src.tracks.track import Track
+
+import main
+
+SIZES: list[int] = [1, 24, 256, 4096]
+NEAT_CONFIG: Path = Path(__file__).resolve().parent.parent / "cfg" / "neat-config.txt"
+
+
+def best_rate(step: Callable[[], int], repeats: int) -> float:
+    """Highest rate of step, which returns how many units it ran."""
+    rates: list[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        units = step()
+        rates.append(units / (time.perf_counter() - start))
+    return max(rates)
+
+
+def make_track(seed: int) -> Track:
+    constants = Constants()
+    return Track(
+        constants.WIDTH,
+        constants.HEIGHT,
+        constants.TRACK_CHECKPOINTS,
+        track_width=constants.TRACK_WIDTH,
+        seed=seed,
+    )
+
+
+def make_genomes(num_cars: int, seed: int) -> tuple[list, neat.Config]:
+    config = neat.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        str(NEAT_CONFIG),
+    )
+    random.seed(seed)
+    genomes = []
+    # Built like a first generation, without speciating it, then varied as
+    # a few generations in
+    for key in range(num_cars):
+        genome = config.genome_type(key)
+        genome.configure_new(config.genome_config)
+        for _ in range(random.randrange(10)):
+            genome.mutate(config.genome_config)
+        genomes.append((key, genome))
+    return genomes, config
+
+
+def spawned_game(
+    num_cars: int, seed: int, sensor: str | None = None
+) -> tuple[main.Game, list, neat.Config]:
+    game = main.Game(headless=True, track=make_track(seed), sensor=sensor)
+    genomes, config = make_genomes(num_cars, seed)
+    game.spawn_genomes(genomes, config)
+    # Cars spread over their first few seconds, not all on the start line
+    for _ in range(60):
+        game._tick()
+    return game, genomes, config
+
+
+def run_ticks(num_ticks: int, tick: Callable[[], None]) -> Callable[[], int]:
+    def step() -> int:
+        for _ in range(num_ticks):
+            tick()
+        return num_ticks
+
+    return step
+
+
+def car_update(num_cars: int, num_ticks: int, repeats: int, seed: int) -> float:
+    game, _, _ = spawned_game(num_cars, seed)
+    batch = game.ctx.car_batch
+    rows = np.arange(len(batch))
+    return best_rate(run_ticks(num_ticks, lambda: batch.update(rows)), repeats)
+
+
+def collider(num_cars: int, num_ticks: int, repeats: int, seed: int) -> float:
+    game, _, _ = spawned_game(num_cars, seed, sensor="sphere")
+    batch = game.ctx.car_batch
+
+    def tick() -> None:
+        # Cars off the track would drop out and make later ticks cheaper
+        batch.active[: len(batch)] = True
+        game.collider.update(game.ctx)
+
+    return best_rate(run_ticks(num_ticks, tick), repeats)
+
+
+def handle_input(num_cars: int, num_ticks: int, repeats: int, seed: int) -> float:
+    game, _, _ = spawned_game(num_cars, seed)
+    batch = game.ctx.car_batch
+    players = game.ctx.players
+    neat_batch = game.neat_batch
+    assert neat_batch is not None
+
+    def tick() -> None:
+        batch.active[: len(batch)] = True
+        neat_batch.update(batch)
+        for player in players:
+            player.handle_input()
+
+    return best_rate(run_ticks(num_ticks, tick), repeats)
+
+
+def track(num_cars: int, num_ticks: int, repeats: int, seed: int) -> float:
+    def step() -> int:
+        for i in range(10):
+            make_track(seed + i)
+        return 10
+
+    return best_rate(step, repeats)
+
+
+def generation(num_cars: int, num_ticks: int, repeats: int, seed: int) -> float:
+    genomes, config = make_genomes(num_cars, seed)
+    rates: list[float] = []
+    for _ in range(repeats):
+        # A fresh game every time, so no repeat finds the networks cached
+        game = main.Game(headless=True, track=make_track(seed))
+        rates.append(best_rate(lambda: game.simulate(genomes, config, 1).ticks, 1))
+    return max(rates)
+
+
+CASES: dict[str, Callable[[int, int, int, int], float]] = {
+    "car_update": car_update,
+    "collider": collider,
+    "handle_input": handle_input,
+    "track": track,
+    "generation": generation,
+}
+
+
+def run(
+    cases: list[str], sizes: list[int], num_ticks: int, repeats: int, seed: int
+) -> dict[str, float]:
+    results: dict[str, float] = {}
+    for case in cases:
+        for size in [0] if case == "track" else sizes:
+            key = case if case == "track" else f"{case}/{size}"
+            results[key] = CASES[case](size, num_ticks, repeats, seed)
+            print(f"{key:>20}: {results[key]:12.1f} per second", flush=True)
+    return results
+
+
+def regressions(
+    results: dict[str, float], baseline: dict[str, float], threshold: float
+) -> list[str]:
+    slower = []
+    for key, rate in results.items():
+        if key in baseline and rate < baseline[key] * (1 - threshold):
+            change = rate / baseline[key] - 1
+            slower.append(f"{key}: {rate:.1f} vs {baseline[key]:.1f} ({change:+.0%})")
+    return slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write the results here")
+    parser.add_argument("--baseline", default=None, help="results to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown against the baseline that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    results = run(args.cases, args.sizes, args.ticks, args.repeats, args.seed)
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "machine": platform.machine(),
+                    "seed": args.seed,
+                    "ticks": args.ticks,
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        slower = regressions(results, baseline, args.threshold)
+        for line in slower:
+            print(f"Regression {line}")
+        if slower:
+            sys.exit(1)
@@ -0,0 +1,87 @@
+"""Per tick time and Vec2 allocations of the headless simulation hot path.
+
+One tick is what Game._tick runs: controllers, Collider.update, the car
+physics (Car.update for the whole CarBatch) and the score update.
+
+    python -m bench.tick_allocations --cars 256 --ticks 300
+
+This measures the current tree only. The numbers from before and after
+Vec2 became a slotted float vector, with 256 cars on one machine, were:
+
+    Vec2 backed by a float32 ndarray: 1536 Vec2 per tick, 4.3-8.9 ms per tick
+    slotted Vec2, in-place updates:    512 Vec2 per tick, 1.7-3.6 ms per tick
+
+Since then the per-tick code reads the CarBatch arrays directly, so a tick
+makes no Vec2 at all, and the in-place Vec2 operations were dropped as
+nothing called them any more.
+"""
+
+import argparse
+import contextlib
+import statistics
+import time
+import tracemalloc
+from collections.abc import Iterator
+
+from src.vec.vec2 import Vec2
+
+from bench.suite import make_genomes, make_track
+import main
+
+
+@contextlib.contextmanager
+def count_vec2() -> Iterator[list[int]]:
+    """Counts every Vec2 made inside the block, however it is constructed."""
+    counter = [0]
+    original_new = Vec2.__new__
+
+    def counting_new(cls, *args, **kwargs):
+        counter[0] += 1
+        return original_new(cls)
+
+    Vec2.__new__ = counting_new
+    try:
+        yield counter
+    finally:
+        Vec2.__new__ = original_new
+
+
+def run(num_cars: int, num_ticks: int, seed: int) -> dict[str, float]:
+    game = main.Game(headless=True, track=make_track(seed))
+    genomes, config = make_genomes(num_cars, seed)
+    game.spawn_genomes(genomes, config)
+
+    times: list[float] = []
+    with count_vec2() as counter:
+        for _ in range(num_ticks):
+            start = time.perf_counter()
+            game._tick()
+            times.append(time.perf_counter() - start)
+    vec2_per_tick = counter[0] / num_ticks
+
+    tracemalloc.start()
+    game._tick()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cars": num_cars,
+        "tick_ms": statistics.median(times) * 1000,
+        "vec2_per_tick": vec2_per_tick,
+        "peak_kib_per_tick": peak / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cars", type=int, default=256)
+    parser.add_argument("--ticks", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = run(args.cars, args.ticks, args.seed)
+    print(
+        f"{result['cars']} cars: {result['tick_ms']:.3f} ms per tick,"
+        f" {result['vec2_per_tick']:.1f} Vec2 per tick,"
+        f" {result['peak_kib_per_tick']:.1f} KiB peak per tick"
+    )
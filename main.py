@@ -1,77 +1,216 @@
 import raylib as rl
+import argparse
+import atexit
+from functools import partial
+from typing import Any, Callable
 import os
+import time
 import neat
+import numpy as np
 
 from src.controllers.player import Player
 from src.controllers.neatai import NeatAI
+from src.controllers.neatai_batch import NeatAIBatch
+from src.controllers.compiled_network import CompiledNetwork
+from src.controllers.network_cache import NetworkCache
 from src.collision.collider import Collider
-from src.contexts.context import Context
+from src.collision.distance_field import DistanceField
+from src.collision.ray_sensors import SENSORS, make_sensor
+from src.collision.track_mask import TrackMask
+from src.contexts.context import Constants, Context
+from src.profiling.tick_profiler import TickProfiler
+from src.replay.replay import Replay, ReplayRecorder
+from src.replay.replay_player import ReplayPlayer
+from src.tracks.track import Track
+from src.tracks.track_cache import TrackCache
+from src.training.parallel_evaluator import ParallelEvaluator
+from src.training.progress_monitor import GenerationStats, ProgressMonitor
+from src.training.telemetry import TelemetrySink, generation_record
+from src.training.track_pool import TrackPool, TrackPoolEvaluator
 from src.vehicle.car import Car
 from src.view.render import Renderer
+from src.view.view_policy import ViewPolicy
 
 
 class Game:
-    def __init__(self, *, playable: bool = False, num_ai: int = 0) -> None:
+    def __init__(
+        self,
+        *,
+        playable: bool = False,
+        num_ai: int = 0,
+        headless: bool = False,
+        ticks_per_frame: int | None = None,
+        track: Track | None = None,
+        track_mask: TrackMask | None = None,
+        distance_field: DistanceField | None = None,
+        replay_dir: str | None = None,
+        seed: int | None = None,
+        profiler: TickProfiler | None = None,
+        sensor: str | None = None,
+    ) -> None:
+        assert not (playable and headless), "Players need a window"
+        assert track_mask is None or track is not None
+        assert distance_field is None or track_mask is not None
         self._playable = playable
         self._num_ai = num_ai
-        self.ctx = Context()
+        self._headless = headless
+        self.ctx = Context(track)
+        self._ticks_per_frame: int = (
+            self.ctx.constants.TICKS_PER_FRAME
+            if ticks_per_frame is None
+            else ticks_per_frame
+        )
+        assert self._ticks_per_frame > 0
+        self._sensor: str = self.ctx.constants.RAY_SENSOR if sensor is None else sensor
         self.renderer = Renderer(self.ctx.constants.WIDTH, self.ctx.constants.HEIGHT)
         self.collider: Collider
+        self.neat_batch: NeatAIBatch | None = None
+        self.view_policy = ViewPolicy()
+        self.network_cache = NetworkCache(self.ctx.constants.NETWORK_CACHE_SIZE)
+        self.progress_monitor = ProgressMonitor(
+            self.ctx.constants.STALL_TICKS, self.ctx.constants.STALL_DISTANCE
+        )
+        # Every generation is saved to replay_dir, seed is the track's if known
+        self._replay_dir: str | None = replay_dir
+        self.recorder: ReplayRecorder | None = (
+            None
+            if replay_dir is None
+            else ReplayRecorder(self.ctx.constants.REPLAY_KEYFRAME_TICKS, seed)
+        )
 
-        self._init(self.ctx, self.renderer)
+        # Times every phase of every tick and shows it next to the stats
+        self.profiler: TickProfiler | None = profiler
 
-    def _init(self, ctx: Context, renderer: Renderer) -> None:
+        self._init(self.ctx, self.renderer, track_mask, distance_field)
+
+    def _init(
+        self,
+        ctx: Context,
+        renderer: Renderer,
+        track_mask: TrackMask | None,
+        distance_field: DistanceField | None,
+    ) -> None:
         start_node = self.ctx.track.starting_node()
         start_angle = self.ctx.track.starting_angle_degree()
 
         if self._playable:
-            player_car = Car(start_node.x, start_node.y, start_angle)
+            player_car = Car(
+                start_node.x, start_node.y, start_angle, batch=ctx.car_batch
+            )
             player = Player(player_car)
             self.ctx.add_player(player)
 
-        rl.InitWindow(ctx.constants.WIDTH, ctx.constants.HEIGHT, b"Py-kart")
-        rl.SetTargetFPS(self.ctx.constants.TARGET_FPS)
+        if not self._headless:
+            rl.InitWindow(ctx.constants.WIDTH, ctx.constants.HEIGHT, b"Py-kart")
+            rl.SetTargetFPS(self.ctx.constants.TARGET_FPS)
+
+            renderer.bake_track(ctx)
+            renderer.bake_cars()
 
-        renderer.bake_track(ctx)
+        if track_mask is None and self._headless:
+            track_mask = TrackMask.from_track(
+                ctx.track, ctx.constants.WIDTH, ctx.constants.HEIGHT
+            )
+        elif track_mask is None:
+            track_mask = TrackMask.from_texture(
+                renderer._track_texture.texture, ctx.constants.TRACK_COLOR
+            )
+        self.collider = Collider(
+            track_mask,
+            make_sensor(self._sensor, track_mask, distance_field, ctx.track),
+        )
+        self.collider.profiler = self.profiler
 
-        self.collider = Collider(renderer._track_texture.texture)
+    def _running(self) -> bool:
+        return self._headless or not rl.WindowShouldClose()
 
     def run(self) -> None:
         while not rl.WindowShouldClose():
-            self._handle_input()
-            self._update()
+            for _ in range(self._ticks_per_frame):
+                self._tick()
+            if self.profiler is not None:
+                self.profiler.restart()
             self.renderer.begin()
             self.renderer.draw(self.ctx)
+            if self.profiler is not None:
+                self.profiler.lap(TickProfiler.DRAW)
+                self.renderer.draw_profile(self.ctx, self.profiler)
             self.renderer.end()
 
+    def _tick(self, *, should_remove: bool = False) -> None:
+        """One step of the fixed timestep: controllers, sensors and physics."""
+        if self.profiler is not None:
+            self.profiler.begin_tick()
+        if self.neat_batch is not None:
+            self.neat_batch.update(self.ctx.car_batch)
+        if self.profiler is not None:
+            self.profiler.lap(TickProfiler.NETWORKS)
+        self._handle_input()
+        if self.profiler is not None:
+            self.profiler.lap(TickProfiler.INPUT)
+        self._update(should_remove=should_remove)
+        if self.recorder is not None:
+            self.recorder.record(self.ctx)
+
     def _handle_input(self) -> None:
         for player in self.ctx.players:
+            # Inactive cars stay where they are, their commands change nothing
+            if not player._car.active:
+                continue
             for command in player.handle_input():
                 command.execute()
 
     def _update(self, *, should_remove: bool = False) -> None:
         self.collider.update(self.ctx)
-        for i, player in enumerate(reversed(self.ctx.players)):
-            if player._car.active:
-                player._car.update()
-            elif should_remove:
-                self.ctx.players.pop(i)
+        if self.profiler is not None:
+            # Lost cars make the collider return before its own laps
+            self.profiler.restart()
+        self.ctx.car_batch.update()
+        if self.profiler is not None:
+            self.profiler.lap(TickProfiler.PHYSICS)
+        if should_remove:
+            self.ctx.players[:] = [
+                player for player in self.ctx.players if player._car.active
+            ]
 
-        for player in self.ctx.players:
-            player.update_score()
+        if self.neat_batch is not None:
+            self.neat_batch.update_scores(self.ctx.car_batch, self.ctx.track)
+        else:
+            for player in self.ctx.players:
+                player.update_score()
+        if self.profiler is not None:
+            self.profiler.lap(TickProfiler.SCORE)
 
-    def eval_genomes(self, genomes, config):
-        global CUR_GEN, MAX_GEN
+    def eval_genomes(self, genomes, config) -> GenerationStats:
+        global CUR_GEN
         CUR_GEN += 1
-        self.ctx.players.clear()
+        return self.simulate(genomes, config, CUR_GEN)
+
+    def spawn_genomes(self, genomes, config) -> None:
+        """Puts one fresh car on the start for every genome."""
+        self.ctx.clear_players()
         start_node = self.ctx.track.starting_node()
         start_angle = self.ctx.track.starting_angle_degree()
+        controllers: list[NeatAI] = []
+        compiled: list[CompiledNetwork] = []
         for _, genome in genomes:
             genome.fitness = 0.0
-            neat_car = Car(start_node.x, start_node.y, start_angle, 8)
-            neat_net = neat.nn.FeedForwardNetwork.create(genome, config)
-            neat_controller = NeatAI(neat_car, genome, neat_net)
+            neat_car = Car(
+                start_node.x, start_node.y, start_angle, 8, batch=self.ctx.car_batch
+            )
+            neat_net, compiled_net = self.network_cache.get(genome, config)
+            neat_controller = NeatAI(neat_car, genome, neat_net, self.ctx.track)
             self.ctx.add_player(neat_controller)
+            controllers.append(neat_controller)
+            compiled.append(compiled_net)
+        self.neat_batch = NeatAIBatch(controllers, compiled)
+        self.progress_monitor.reset(self.ctx.car_batch)
+        if self.recorder is not None:
+            self.recorder.start(self.ctx)
+
+    def simulate(self, genomes, config, generation: int) -> GenerationStats:
+        """Drives one car per genome and leaves the score in genome.fitness."""
+        self.spawn_genomes(genomes, config)
 
         tick = 0
 
@@ -80,24 +219,126 @@ class Game:
             - self.ctx.constants.LEARN_TIME_SEC_MIN
         )
         time_sec = (
-            CUR_GEN / MAX_GEN * time_range + self.ctx.constants.LEARN_TIME_SEC_MIN
+            generation / MAX_GEN * time_range + self.ctx.constants.LEARN_TIME_SEC_MIN
         )
 
-        max_ticks = int(self.ctx.constants.TARGET_FPS * time_sec)
+        max_ticks = int(self.ctx.constants.TICK_RATE * time_sec)
+        sample_ticks = self.ctx.constants.TELEMETRY_SAMPLE_TICKS
+        alive = [self.ctx.car_batch.num_active()]
+        start = time.perf_counter()
+
+        # Stopping is checked after every tick, so the outcome does not
+        # depend on how many ticks run between two frames
+        while tick < max_ticks and self.ctx.car_batch.any_active() and self._running():
+            for _ in range(min(self._ticks_per_frame, max_ticks - tick)):
+                self._tick(should_remove=False)
+                self.progress_monitor.update(self.ctx)
+                tick += 1
+                if tick % sample_ticks == 0:
+                    alive.append(self.ctx.car_batch.num_active())
+                if not self.ctx.car_batch.any_active():
+                    break
+            if not self._headless:
+                self._present(generation)
+        simulate_sec = time.perf_counter() - start
+        if tick % sample_ticks:
+            alive.append(self.ctx.car_batch.num_active())
+        batch = self.ctx.car_batch
+        # Cars start on their first checkpoint
+        checkpoints = np.bincount(batch.checkpoints[: len(batch)] - 1)
 
+        self.neat_batch = None
+        if self.recorder is not None and self._replay_dir is not None:
+            os.makedirs(self._replay_dir, exist_ok=True)
+            path = os.path.join(self._replay_dir, f"gen-{generation:04}.npz")
+            self.recorder.replay(self.ctx).save(path)
+        return GenerationStats(
+            generation,
+            tick,
+            max_ticks,
+            self.network_cache.take_stats(),
+            simulate_sec=simulate_sec,
+            alive=tuple(alive),
+            sample_ticks=sample_ticks,
+            checkpoints=tuple(checkpoints.tolist()),
+        )
+
+    def play_replay(self, replay: Replay) -> None:
+        """Plays a recorded run, Space pauses, Left and Right seek by a keyframe."""
+        self.ctx.clear_players()
+        self.ctx.car_batch.clear()
+        player = ReplayPlayer(replay, self.ctx.car_batch)
+        paused = False
         while not rl.WindowShouldClose():
-            self._handle_input()
-            self._update(should_remove=False)
+            if rl.IsKeyPressed(rl.KEY_SPACE):
+                paused = not paused
+            if rl.IsKeyPressed(rl.KEY_RIGHT):
+                player.seek(player.tick + replay.keyframe_ticks)
+            elif rl.IsKeyPressed(rl.KEY_LEFT):
+                player.seek(player.tick - replay.keyframe_ticks)
+            elif not paused:
+                for _ in range(self._ticks_per_frame):
+                    player.step()
+
             self.renderer.begin()
-            self.renderer.draw(self.ctx)
-            self.renderer.draw_stats(self.ctx, CUR_GEN, MAX_GEN)
+            self.renderer.draw(self.ctx, [car for car in player.cars if car.active])
+            self.renderer.draw_stats(self.ctx, player.tick, replay.num_ticks)
             self.renderer.end()
-            if not any(self.ctx.cars):
-                break
 
-            tick += 1
-            if tick >= max_ticks:
-                break
+    def _present(self, generation: int) -> None:
+        self.view_policy.handle_keys()
+        draw_scene, draw_stats = self.view_policy.next_frame()
+        if not draw_stats:
+            # Keeps the window responsive without waiting for the frame rate
+            rl.PollInputEvents()
+            return
+
+        if self.profiler is not None:
+            self.profiler.restart()
+        self.renderer.begin()
+        if draw_scene:
+            self.renderer.draw(self.ctx, self.view_policy.cars(self.ctx))
+        else:
+            self.renderer.clear(self.ctx)
+        self.renderer.draw_stats(self.ctx, generation, MAX_GEN, str(self.view_policy))
+        if self.profiler is not None:
+            self.profiler.lap(TickProfiler.DRAW)
+            self.renderer.draw_profile(self.ctx, self.profiler)
+        self.renderer.end()
+
+
+def reported(
+    eval_genomes: Callable[[Any, Any], GenerationStats],
+    telemetry: TelemetrySink | None = None,
+) -> Callable[[Any, Any], None]:
+    # End of the previous evaluation, NEAT breeds the next generation after it
+    evaluated: float | None = None
+
+    def run(genomes, config) -> None:
+        nonlocal evaluated
+        start = time.perf_counter()
+        stats = eval_genomes(genomes, config)
+        end = time.perf_counter()
+        if telemetry is not None:
+            telemetry.write(
+                generation_record(
+                    stats,
+                    genomes,
+                    end - start,
+                    None if evaluated is None else start - evaluated,
+                )
+            )
+        evaluated = end
+        networks = stats.networks
+        tracks = f" on {stats.tracks} tracks" if stats.tracks > 1 else ""
+        print(
+            f"Generation {stats.generation}{tracks}: {stats.ticks} / {stats.max_ticks} ticks,"
+            f" {stats.ticks_saved} saved by stopping early; networks"
+            f" {networks.hits} cached, {networks.misses} compiled"
+            f" in {networks.compile_sec * 1000:.1f} ms"
+        )
+
+    return run
 
 
 CUR_GEN: int = 0
@@ -105,7 +346,88 @@ MAX_GEN: int = 200
 
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--headless", action="store_true", help="train without a window at full speed"
+    )
+    parser.add_argument(
+        "--ticks-per-frame",
+        type=int,
+        default=None,
+        help="simulation ticks run between two rendered frames",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="evaluate genomes in this many processes, needs --headless",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="load the track generated from this seed, building it on first use",
+    )
+    parser.add_argument(
+        "--track-cache",
+        default="tracks",
+        help="directory of saved tracks used with --seed",
+    )
+    parser.add_argument(
+        "--tracks",
+        type=int,
+        default=1,
+        help="score every genome on this many tracks, seeds from --seed on,"
+        " needs --headless",
+    )
+    parser.add_argument(
+        "--track-fitness",
+        choices=sorted(TrackPoolEvaluator.COMBINE),
+        default="mean",
+        help="how the fitness values of a genome on several tracks combine",
+    )
+    parser.add_argument(
+        "--sensor",
+        choices=SENSORS,
+        default=None,
+        help="ray sensor backend, sphere tracing unless set",
+    )
+    parser.add_argument(
+        "--record",
+        default=None,
+        help="save a replay of every generation to this directory",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        help="play back a replay file saved with --record instead of training",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        help="time every phase of the last ticks, shown in the window and"
+        " saved to this .csv or .json file on exit, needs one process",
+    )
+    parser.add_argument(
+        "--telemetry",
+        default=None,
+        help="append a JSON line of timings, fitness and progress per generation"
+        " to this file",
+    )
+    args = parser.parse_args()
+    assert args.workers <= 1 or args.headless, "--workers needs --headless"
+    assert args.workers <= 1 or args.record is None, "--record needs one process"
+    assert args.tracks <= 1 or args.headless, "--tracks needs --headless"
+    assert args.tracks <= 1 or args.record is None, "--record needs one track"
+    assert args.workers <= 1 or args.profile is None, "--profile needs one process"
+    assert args.tracks <= 1 or args.profile is None, "--profile needs one track"
+
+    if args.replay is not None:
+        replay = Replay.load(args.replay)
+        Game(ticks_per_frame=args.ticks_per_frame, track=replay.track()).play_replay(
+            replay
+        )
+        raise SystemExit
 
     local_dir = os.path.dirname(__file__)
     neat_config = neat.Config(
@@ -116,5 +438,71 @@ if __name__ == "__main__":
         os.path.join(local_dir, "cfg", "neat-config.txt"),
     )
     population = neat.Population(neat_config)
-    population.run(game.eval_genomes, MAX_GEN)
+    telemetry = None
+    if args.telemetry is not None:
+        telemetry = TelemetrySink(args.telemetry)
+        # Writes out the last records however training ends
+        atexit.register(telemetry.close)
+
+    if args.tracks > 1:
+        constants = Constants()
+        first_seed = 0 if args.seed is None else args.seed
+        track_pool = TrackPool.build(
+            TrackCache(args.track_cache),
+            list(range(first_seed, first_seed + args.tracks)),
+            constants.WIDTH,
+            constants.HEIGHT,
+            constants.TRACK_CHECKPOINTS,
+            constants.TRACK_WIDTH,
+            args.workers or None,
+        )
+        with TrackPoolEvaluator(
+            partial(Game, headless=True, sensor=args.sensor),
+            track_pool,
+            args.workers or None,
+            args.track_fitness,
+        ) as evaluator:
+            population.run(reported(evaluator.eval_genomes, telemetry), MAX_GEN)
+        raise SystemExit
+
+    artifact = None
+    track, track_mask, distance_field = None, None, None
+    if args.seed is not None:
+        constants = Constants()
+        artifact = TrackCache(args.track_cache).get(
+            args.seed,
+            constants.WIDTH,
+            constants.HEIGHT,
+            constants.TRACK_CHECKPOINTS,
+            constants.TRACK_WIDTH,
+        )
+        track, track_mask, distance_field = artifact.load()
+
+    game = Game(
+        headless=args.headless,
+        ticks_per_frame=args.ticks_per_frame,
+        track=track,
+        track_mask=track_mask,
+        distance_field=distance_field,
+        replay_dir=args.record,
+        seed=args.seed,
+        profiler=None if args.profile is None else TickProfiler(),
+        sensor=args.sensor,
+    )
+
+    if args.workers > 1:
+        with ParallelEvaluator(
+            partial(Game, headless=True, sensor=args.sensor),
+            game.ctx.track,
+            game.collider.track_mask,
+            args.workers,
+            artifact,
+        ) as evaluator:
+            population.run(reported(evaluator.eval_genomes, telemetry), MAX_GEN)
+    else:
+        try:
+            population.run(reported(game.eval_genomes, telemetry), MAX_GEN)
+        finally:
+            if game.profiler is not None and args.profile is not None:
+                game.profiler.dump(args.profile)
     # game.run()
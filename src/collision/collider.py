@@ -1,99 +1,107 @@
-import raylib as rl
-
-import math
+import numpy as np
 
+from src.collision.ray_sensors import RaySensor, make_sensor
+from src.collision.track_mask import TrackMask
 from src.contexts.context import Context
-from src.rays.ray import Ray
-from src.vec.vec2 import Vec2
+from src.profiling.tick_profiler import TickProfiler
 from src.vehicle.car import Car
-
-from functools import cache
+from src.vehicle.car_batch import CarBatch
 
 
 class Collider:
-    def __init__(self, track_texture) -> None:
-        self._track_colors: list[rl.Color] = self._init_track_colors(track_texture)
-        self._track_width: int = track_texture.width
+    def __init__(self, track_mask: TrackMask, sensor: RaySensor | None = None) -> None:
+        self._track_mask: TrackMask = track_mask
+        self._sensor: RaySensor = (
+            make_sensor("sphere", track_mask) if sensor is None else sensor
+        )
+        self._ray_directions: dict[int, np.ndarray] = {}
+        self.profiler: TickProfiler | None = None
 
-    def _init_track_colors(self, track_texture):
-        track_image = rl.LoadImageFromTexture(track_texture)
-        return rl.LoadImageColors(track_image)
+    @property
+    def track_mask(self) -> TrackMask:
+        return self._track_mask
 
     def update(self, ctx: Context) -> None:
-        track_color = Collider.track_rl_color(ctx.constants.TRACK_COLOR)
-
-        for player in ctx.players:
-            if not player._car.active:
+        """Checks every active car of ctx.car_batch, the batch of all players."""
+        players = [player for player in ctx.players if player._car.active]
+        if not players:
+            return
+
+        batch = ctx.car_batch
+        rows = np.array([player._car.row for player in players])
+        positions = batch.pos[rows]
+        on_track = self._track_mask.on_track_many(positions[:, 0], positions[:, 1])
+        for i in np.flatnonzero(~on_track):
+            players[i].deactivate()
+
+        rows = rows[on_track]
+        self._update_checkpoints(ctx, batch, rows)
+        if self.profiler is not None:
+            self.profiler.lap(TickProfiler.CHECKPOINTS)
+        self._update_cars_rays(ctx, batch, rows)
+        if self.profiler is not None:
+            self.profiler.lap(TickProfiler.RAYS)
+
+    def _update_cars_rays(
+        self, ctx: Context, batch: CarBatch, rows: np.ndarray
+    ) -> None:
+        num_rays = batch.num_rays[rows]
+        for n in np.unique(num_rays).tolist():
+            if n == 0:
                 continue
-
-            current_color = self._color_at(player._car._pos.x, player._car._pos.y)
-            if not Collider.same_color(current_color, track_color):
-                player.deactivate()
-                continue
-
-            self._update_car_rays(ctx, player._car.rays)
-            self._update_checkpoint(ctx, player._car)
-
-    def _update_car_rays(self, ctx: Context, rays: list[Ray]) -> None:
-        for ray in rays:
-            angle_rad = math.radians(ray.angle_deg)
-            origin_color = self._color_at(ray.origin.x, ray.origin.y)
-            length: int = 8
-            hit = Collider.ray_point(ray.origin, angle_rad, length)
-
-            def should_grow() -> bool:
-                return (
-                    Collider.in_range(
-                        hit.x, hit.y, ctx.constants.WIDTH, ctx.constants.HEIGHT
-                    )
-                    and Collider.same_color(origin_color, self._color_at(hit.x, hit.y))
-                    and length <= ctx.constants.MAX_RAY_LENGTH
-                )
-
-            while should_grow():
-                length += 2
-                hit = Collider.ray_point(ray.origin, angle_rad, length)
-            ray.hit = hit
-
-    def _update_checkpoint(self, ctx: Context, car: Car) -> None:
-        next_idx: int = car.checkpoints_matched
-        if car.next_checkpoint is None:
-            next: Vec2 = ctx.track.checkpoint(next_idx)
-            car.next_checkpoint = next
-
-        assert car.next_checkpoint
-        collision = rl.CheckCollisionCircleRec(
-            (car.next_checkpoint.x, car.next_checkpoint.y),
-            ctx.constants.CHECKPOINT_RADIUS * 1.5,
-            car.rect,
+            group = rows[num_rays == n]
+            headings = np.radians(batch.rotation_degree[group])
+            batch.ray_lengths[group, :n] = self._sensor.cast(
+                batch.pos[group],
+                self._directions(n, headings),
+                ctx.constants.MAX_RAY_LENGTH,
+            )
+
+    def _directions(self, num_rays: int, headings: np.ndarray) -> np.ndarray:
+        if num_rays not in self._ray_directions:
+            relative = np.radians(Car.relative_ray_angles(num_rays))
+            self._ray_directions[num_rays] = np.stack(
+                (np.cos(relative), np.sin(relative)), axis=1
+            )
+        table = self._ray_directions[num_rays]
+
+        # Rotate the relative direction table by each car heading
+        cos = np.cos(headings)[:, None]
+        sin = np.sin(headings)[:, None]
+        return np.stack(
+            (
+                cos * table[:, 0] - sin * table[:, 1],
+                sin * table[:, 0] + cos * table[:, 1],
+            ),
+            axis=2,
         )
-        if collision:
-            car.checkpoints_matched += 1
-            car.next_checkpoint = ctx.track.checkpoint(next_idx + 1)
-
-    @classmethod
-    @cache
-    def track_rl_color(cls, color: tuple[int, int, int, int]):
-        return rl.ffi.new("struct Color *", color)
 
-    def _color_at(self, x: float, y: float):
-        return self._track_colors[int(y) * self._track_width + int(x)]
+    def _update_checkpoints(
+        self, ctx: Context, batch: CarBatch, rows: np.ndarray
+    ) -> None:
+        gate_starts, gate_ends = ctx.track.checkpoint_gates()
+        next_gates = batch.checkpoints[rows] % len(gate_starts)
+        crossed = Collider.segments_cross(
+            batch.prev_pos[rows],
+            batch.pos[rows],
+            gate_starts[next_gates],
+            gate_ends[next_gates],
+        )
+        batch.checkpoints[rows[crossed]] += 1
 
-    @classmethod
-    def delta(cls, angle: float, length: float) -> tuple[float, float]:
-        dx = math.cos(angle) * length
-        dy = math.sin(angle) * length
-        return dx, dy
+        checkpoints = ctx.track.checkpoint_positions()
+        next_checkpoints = batch.checkpoints[rows] % len(checkpoints)
+        batch.next_checkpoint[rows] = checkpoints[next_checkpoints]
 
     @classmethod
-    def ray_point(cls, origin: Vec2, angle_rad: float, length: float) -> Vec2:
-        dx, dy = Collider.delta(angle_rad, length)
-        return origin.added(dx, dy)
+    def segments_cross(
+        cls, p: np.ndarray, q: np.ndarray, a: np.ndarray, b: np.ndarray
+    ) -> np.ndarray:
+        """Row-wise test whether segments p -> q cross segments a -> b."""
 
-    @classmethod
-    def same_color(cls, lhs, rhs) -> bool:
-        return lhs.r == rhs.r and lhs.g == rhs.g and lhs.b == rhs.b
+        def side(origin: np.ndarray, end: np.ndarray, point: np.ndarray):
+            d = end - origin
+            w = point - origin
+            return d[:, 0] * w[:, 1] - d[:, 1] * w[:, 0] > 0
 
-    @classmethod
-    def in_range(cls, x, y, width, height) -> bool:
-        return 0 <= x and x < width and 0 <= y and y < height
+        return (side(a, b, p) != side(a, b, q)) & (side(p, q, a) != side(p, q, b))
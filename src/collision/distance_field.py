@@ -0,0 +1,73 @@
+from __future__ import annotations
+import numpy as np
+
+from src.collision.track_mask import TrackMask
+
+
+class DistanceField:
+    """Per pixel distance to the nearest off-track pixel, capped at max_distance.
+
+    Pixels outside the mask count as off-track. Values are floored, so they
+    never overestimate the free space around a pixel.
+    """
+
+    def __init__(self, track_mask: TrackMask, max_distance: int = 32) -> None:
+        self._max_distance: int = max_distance
+        self._width: int = track_mask.width
+        self._height: int = track_mask.height
+        self._field: np.ndarray = self._compute(track_mask.unpacked(), max_distance)
+
+    @classmethod
+    def from_field(cls, field: np.ndarray, max_distance: int) -> DistanceField:
+        """Wraps a field computed earlier, such as a memory mapped one."""
+        distance_field = cls.__new__(cls)
+        distance_field._max_distance = max_distance
+        distance_field._height, distance_field._width = field.shape
+        distance_field._field = field
+        return distance_field
+
+    @property
+    def max_distance(self) -> int:
+        return self._max_distance
+
+    @property
+    def field(self) -> np.ndarray:
+        return self._field
+
+    def at(self, x: float, y: float) -> int:
+        if not (0 <= x < self._width and 0 <= y < self._height):
+            return 0
+        return int(self._field[int(y), int(x)])
+
+    def at_many(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        inside = (0 <= xs) & (xs < self._width) & (0 <= ys) & (ys < self._height)
+        ix = np.where(inside, xs, 0).astype(np.intp)
+        iy = np.where(inside, ys, 0).astype(np.intp)
+        return np.where(inside, self._field[iy, ix], 0)
+
+    @classmethod
+    def _compute(cls, mask: np.ndarray, max_distance: int) -> np.ndarray:
+        height, width = mask.shape
+        cap = max_distance + 1
+
+        # Vertical pass: distance to the nearest off-track pixel in the column
+        column = np.empty((height, width), dtype=np.float32)
+        run = np.zeros(width, dtype=np.float32)
+        for y in range(height):
+            run = np.where(mask[y], np.minimum(run + 1, cap), 0)
+            column[y] = run
+        run = np.zeros(width, dtype=np.float32)
+        for y in range(height - 1, -1, -1):
+            run = np.where(mask[y], np.minimum(run + 1, cap), 0)
+            column[y] = np.minimum(column[y], run)
+
+        # Horizontal pass over a bounded window, the border counts as off-track
+        padded = np.zeros((height, width + 2 * cap), dtype=np.float32)
+        padded[:, cap : cap + width] = column**2
+        squared = np.full((height, width), cap**2, dtype=np.float32)
+        for dx in range(-cap, cap + 1):
+            shifted = padded[:, cap + dx : cap + dx + width]
+            np.minimum(squared, shifted + dx * dx, out=squared)
+
+        distance = np.floor(np.sqrt(squared))
+        return np.minimum(distance, max_distance).astype(np.uint8)
@@ -0,0 +1,169 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+from src.collision.distance_field import DistanceField
+from src.collision.segment_grid import SegmentGrid
+from src.collision.track_mask import TrackMask
+from src.tracks.track import Track
+
+
+class RaySensor(ABC):
+    START_LENGTH: int = 8
+    STEP: int = 2
+
+    @abstractmethod
+    def cast(
+        self, origins: np.ndarray, directions: np.ndarray, max_length: int
+    ) -> np.ndarray:
+        """Lengths at which rays first leave the track.
+
+        origins has shape (N, 2), directions holds unit vectors of shape
+        (N, R, 2) and the result has shape (N, R).
+        """
+        pass
+
+    @classmethod
+    def _length_limit(cls, max_length: int) -> int:
+        # First sampled length past max_length, where marching gives up
+        steps = (max_length - cls.START_LENGTH) // cls.STEP + 1
+        return cls.START_LENGTH + steps * cls.STEP
+
+    @classmethod
+    def _flatten(
+        cls, origins: np.ndarray, directions: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        num_rays = directions.shape[1]
+        xs = np.repeat(origins[:, 0], num_rays)
+        ys = np.repeat(origins[:, 1], num_rays)
+        dxs = directions[:, :, 0].ravel()
+        dys = directions[:, :, 1].ravel()
+        return xs, ys, dxs, dys
+
+
+class MarchingSensor(RaySensor):
+    def __init__(self, track_mask: TrackMask) -> None:
+        super().__init__()
+        self._track_mask = track_mask
+
+    def cast(
+        self, origins: np.ndarray, directions: np.ndarray, max_length: int
+    ) -> np.ndarray:
+        xs, ys, dxs, dys = self._flatten(origins, directions)
+        limit = self._length_limit(max_length)
+        lengths = np.full(xs.shape, self.START_LENGTH, dtype=np.int64)
+        marching = np.arange(xs.size)
+        while marching.size:
+            length = lengths[marching]
+            on_track = self._track_mask.on_track_many(
+                xs[marching] + dxs[marching] * length,
+                ys[marching] + dys[marching] * length,
+            )
+            marching = marching[on_track]
+            lengths[marching] += self.STEP
+            marching = marching[lengths[marching] < limit]
+        return lengths.reshape(directions.shape[:2])
+
+
+class SphereTracingSensor(RaySensor):
+    """Marches on the same lattice as MarchingSensor, skipping every sample
+    the distance field proves to be on track, so the hits are identical."""
+
+    # Flooring both ends of a step can bring pixels up to sqrt(2) closer
+    SAFETY: float = 1.5
+
+    def __init__(self, distance_field: DistanceField) -> None:
+        super().__init__()
+        self._distance_field = distance_field
+
+    def cast(
+        self, origins: np.ndarray, directions: np.ndarray, max_length: int
+    ) -> np.ndarray:
+        xs, ys, dxs, dys = self._flatten(origins, directions)
+        limit = self._length_limit(max_length)
+        lengths = np.full(xs.shape, self.START_LENGTH, dtype=np.int64)
+        marching = np.arange(xs.size)
+        while marching.size:
+            length = lengths[marching]
+            distance = self._distance_field.at_many(
+                xs[marching] + dxs[marching] * length,
+                ys[marching] + dys[marching] * length,
+            )
+            marching = marching[distance > 0]
+            skip = (distance[distance > 0] - self.SAFETY) // self.STEP * self.STEP
+            step = np.maximum(skip, self.STEP).astype(np.int64)
+            lengths[marching] = np.minimum(lengths[marching] + step, limit)
+            marching = marching[lengths[marching] < limit]
+        return lengths.reshape(directions.shape[:2])
+
+
+class BoundarySensor(RaySensor):
+    """Exact intersections with the track boundary polylines, needs no raster.
+
+    Reads like the marching sensors: walls closer than START_LENGTH read
+    START_LENGTH and rays hitting nothing within max_length read the length
+    where marching gives up.
+    """
+
+    def __init__(
+        self, boundary_segments: tuple[np.ndarray, np.ndarray], cell_size: int = 32
+    ) -> None:
+        super().__init__()
+        starts, ends = boundary_segments
+        self._grid = SegmentGrid(starts, ends, cell_size)
+
+    def cast(
+        self, origins: np.ndarray, directions: np.ndarray, max_length: int
+    ) -> np.ndarray:
+        xs, ys, dxs, dys = self._flatten(origins, directions)
+        cell_size = self._grid.cell_size
+
+        # Samples at most one cell apart, the last one at the ray end
+        num_samples = -(-max_length // cell_size) + 1
+        ts = np.minimum(np.arange(num_samples) * cell_size, max_length)
+        samples = np.stack(
+            (xs[:, None] + dxs[:, None] * ts, ys[:, None] + dys[:, None] * ts), axis=2
+        )
+        rows, ids = self._grid.candidates(samples)
+
+        ax = self._grid.starts[ids, 0] - xs[rows]
+        ay = self._grid.starts[ids, 1] - ys[rows]
+        ex = self._grid.ends[ids, 0] - self._grid.starts[ids, 0]
+        ey = self._grid.ends[ids, 1] - self._grid.starts[ids, 1]
+        dx = dxs[rows]
+        dy = dys[rows]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            denom = dx * ey - dy * ex
+            t = (ax * ey - ay * ex) / denom
+            u = (ax * dy - ay * dx) / denom
+        hit = (denom != 0) & (0 <= t) & (t <= max_length) & (0 <= u) & (u <= 1)
+
+        lengths = np.full(len(xs), float(self._length_limit(max_length)))
+        np.minimum.at(lengths, rows[hit], t[hit])
+        lengths = np.maximum(lengths, self.START_LENGTH)
+        return lengths.reshape(directions.shape[:2])
+
+
+SENSORS: tuple[str, ...] = ("march", "sphere", "boundary")
+
+
+def make_sensor(
+    kind: str,
+    track_mask: TrackMask,
+    distance_field: DistanceField | None = None,
+    track: Track | None = None,
+) -> RaySensor:
+    """Sensor backend by name, building the distance field if none is given.
+
+    The boundary sensor intersects the walls of track and needs no raster.
+    """
+    if kind == "march":
+        return MarchingSensor(track_mask)
+    if kind == "sphere":
+        return SphereTracingSensor(
+            DistanceField(track_mask) if distance_field is None else distance_field
+        )
+    if kind == "boundary":
+        assert track is not None, "The boundary sensor needs the track"
+        return BoundarySensor(track.boundary_segments())
+    raise ValueError(f"Unknown ray sensor {kind!r}, expected one of {SENSORS}")
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class SegmentGrid:
+    """Uniform grid over line segments.
+
+    Every segment is listed in the cells its bounding box touches plus
+    margin cells around them, so a cell holds every segment passing within
+    margin cells of it. Sampling a path every cell_size and gathering the
+    cells of the samples therefore never misses a segment the path crosses.
+    """
+
+    def __init__(
+        self, starts: np.ndarray, ends: np.ndarray, cell_size: int, margin: int = 1
+    ) -> None:
+        self._starts: np.ndarray = starts.astype(np.float64)
+        self._ends: np.ndarray = ends.astype(np.float64)
+        self._cell_size: int = cell_size
+
+        lo = np.minimum(self._starts, self._ends)
+        hi = np.maximum(self._starts, self._ends)
+        self._origin: np.ndarray = lo.min(axis=0) - margin * cell_size
+        cells_lo = ((lo - self._origin) // cell_size).astype(np.intp) - margin
+        cells_hi = ((hi - self._origin) // cell_size).astype(np.intp) + margin
+        width, height = cells_hi.max(axis=0) + 2
+        self._shape: tuple[int, int] = (int(width), int(height))
+        self._segment_ids: np.ndarray
+        self._cell_starts: np.ndarray
+        self._segment_ids, self._cell_starts = self._build(cells_lo, cells_hi)
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self._starts
+
+    @property
+    def ends(self) -> np.ndarray:
+        return self._ends
+
+    @property
+    def cell_size(self) -> int:
+        return self._cell_size
+
+    def _build(
+        self, cells_lo: np.ndarray, cells_hi: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Segment ids sorted by cell and the offset where each cell starts."""
+        spans = cells_hi - cells_lo + 1
+        segment_ids: list[np.ndarray] = []
+        cell_ids: list[np.ndarray] = []
+        for ox in range(spans[:, 0].max()):
+            for oy in range(spans[:, 1].max()):
+                ids = np.flatnonzero((ox < spans[:, 0]) & (oy < spans[:, 1]))
+                segment_ids.append(ids)
+                cell_ids.append(
+                    self._cell_id(cells_lo[ids, 0] + ox, cells_lo[ids, 1] + oy)
+                )
+        segments = np.concatenate(segment_ids)
+        cells = np.concatenate(cell_ids)
+
+        order = np.argsort(cells, kind="stable")
+
+        # The extra last cell stays empty and answers lookups outside the grid
+        num_cells = self._shape[0] * self._shape[1]
+        counts = np.bincount(cells, minlength=num_cells + 1)
+        return segments[order], np.concatenate(([0], np.cumsum(counts)))
+
+    def _cell_id(self, cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+        return cx * self._shape[1] + cy
+
+    def candidates(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Segments listed in the cells of points shaped (P, K, 2).
+
+        Returns pairs as two flat arrays: the row in P asking and the
+        segment id. A segment can come back more than once for a row.
+        """
+        cells = ((points - self._origin) // self._cell_size).astype(np.intp)
+        cx = cells[..., 0]
+        cy = cells[..., 1]
+        inside = (0 <= cx) & (cx < self._shape[0]) & (0 <= cy) & (cy < self._shape[1])
+        empty = len(self._cell_starts) - 2
+        ids = np.where(inside, self._cell_id(cx, cy), empty).ravel()
+
+        firsts = self._cell_starts[ids]
+        counts = self._cell_starts[ids + 1] - firsts
+        rows = np.repeat(np.arange(len(ids)) // points.shape[1], counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        return rows, self._segment_ids[np.repeat(firsts, counts) + offsets]
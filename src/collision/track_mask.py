@@ -0,0 +1,106 @@
+from __future__ import annotations
+import math
+import numpy as np
+import raylib as rl
+from PIL import Image, ImageDraw
+
+from src.tracks.track import Track
+
+
+class TrackMask:
+    """Bit-packed occupancy map of the track, a set bit means on track."""
+
+    def __init__(self, mask: np.ndarray) -> None:
+        self._height: int = mask.shape[0]
+        self._width: int = mask.shape[1]
+        self._bits: np.ndarray = np.packbits(mask.astype(bool), axis=1)
+
+    @classmethod
+    def from_bits(cls, bits: np.ndarray, width: int) -> TrackMask:
+        """Wraps rows already packed with np.packbits, without copying them."""
+        track_mask = cls.__new__(cls)
+        track_mask._height = bits.shape[0]
+        track_mask._width = width
+        track_mask._bits = bits
+        return track_mask
+
+    @classmethod
+    def from_texture(
+        cls, track_texture, track_color: tuple[int, int, int, int]
+    ) -> TrackMask:
+        image = rl.LoadImageFromTexture(track_texture)
+        colors = rl.LoadImageColors(image)
+        size = image.width * image.height * 4
+        rgba = np.frombuffer(memoryview(rl.ffi.buffer(colors, size)), dtype=np.uint8)
+        rgba = rgba.reshape(image.height, image.width, 4)
+        mask = np.all(rgba[:, :, :3] == np.array(track_color[:3]), axis=2)
+        rl.UnloadImageColors(colors)
+        rl.UnloadImage(image)
+        return cls(mask)
+
+    @classmethod
+    def from_track(cls, track: Track, width: int, height: int) -> TrackMask:
+        """Rasterizes the track on the CPU, no window or GPU needed.
+
+        Covers every pixel within track_width / 2 of the same spline the
+        renderer bakes, as a chain of capsules.
+        """
+        image = Image.new("1", (width, height), 0)
+        draw = ImageDraw.Draw(image)
+        line = track.spline_points()
+        radius = track.track_width / 2
+
+        starts = line[:-1]
+        directions = line[1:] - starts
+        lengths = np.linalg.norm(directions, axis=1, keepdims=True)
+        normals = np.stack((-directions[:, 1], directions[:, 0]), axis=1)
+        offsets = normals / lengths * radius
+        quads = np.stack(
+            (
+                starts + offsets,
+                line[1:] + offsets,
+                line[1:] - offsets,
+                starts - offsets,
+            ),
+            axis=1,
+        )
+        for quad in quads.tolist():
+            draw.polygon([tuple(corner) for corner in quad], fill=1)
+        for x, y in line.tolist():
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=1)
+        return cls(np.array(image, dtype=bool))
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def bits(self) -> np.ndarray:
+        return self._bits
+
+    @property
+    def nbytes(self) -> int:
+        return self._bits.nbytes
+
+    def unpacked(self) -> np.ndarray:
+        return np.unpackbits(self._bits, axis=1, count=self._width).astype(bool)
+
+    def on_track(self, x: float, y: float) -> bool:
+        if not (0 <= x < self._width and 0 <= y < self._height):
+            return False
+        ix = math.floor(x)
+        byte = self._bits[math.floor(y), ix >> 3]
+        return bool((byte >> (7 - (ix & 7))) & 1)
+
+    def on_track_many(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        inside = (0 <= xs) & (xs < self._width) & (0 <= ys) & (ys < self._height)
+        ix = np.where(inside, xs, 0).astype(np.intp)
+        iy = np.where(inside, ys, 0).astype(np.intp)
+        bits = (self._bits[iy, ix >> 3] >> (7 - (ix & 7))) & 1
+        return inside & (bits == 1)
@@ -0,0 +1,30 @@
+from typing import Callable
+
+from src.commands.command import *
+from src.vehicle.car import Car
+
+# Every steering and movement command a controller can choose, by index.
+# Replays store these indices instead of the commands themselves.
+STEERING_ACTIONS: tuple[Callable[[Car], Command], ...] = (
+    lambda car: SteerLeft(car, 1.0),
+    lambda car: SteerLeft(car, 0.5),
+    IdleSteer,
+    lambda car: SteerRight(car, 0.5),
+    lambda car: SteerRight(car, 1.0),
+)
+MOVEMENT_ACTIONS: tuple[Callable[[Car], Command], ...] = (
+    lambda car: MoveBackOrBreak(car, 0.2),
+    IdleMovement,
+    lambda car: Accelerate(car, 0.3),
+)
+
+IDLE_STEER: int = 2
+IDLE_MOVEMENT: int = 1
+
+
+def steering_commands(car: Car, actions: tuple[int, ...]) -> list[Command]:
+    return [STEERING_ACTIONS[action](car) for action in actions]
+
+
+def movement_commands(car: Car, actions: tuple[int, ...]) -> list[Command]:
+    return [MOVEMENT_ACTIONS[action](car) for action in actions]
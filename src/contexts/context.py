@@ -2,11 +2,15 @@ from dataclasses import dataclass
 from src.controllers.controller import Controller
 from src.tracks.track import Track
 from src.vehicle.car import Car
+from src.vehicle.car_batch import CarBatch
 
 
 @dataclass
 class Constants:
     TARGET_FPS: int = 60
+    # Fixed simulation timestep, all car physics is per tick of 1 / TICK_RATE s
+    TICK_RATE: int = 60
+    TICKS_PER_FRAME: int = 1
     LEARN_TIME_SEC_MIN: int = 3
     LEARN_TIME_SEC_MAX: int = 15
 
@@ -14,44 +18,79 @@ class Constants:
     WIDTH: int = WINDOW_SCALE * 16
     HEIGHT: int = WINDOW_SCALE * 9
     MAX_RAY_LENGTH: int = 96
+    # Ray sensor backend, "march" over the track mask or "sphere" traced
+    # through its distance field, both give the same lengths, or "boundary"
+    # intersecting the track walls exactly
+    RAY_SENSOR: str = "sphere"
 
     TRACK_WIDTH: int = 64
+    TRACK_CHECKPOINTS: int = 30
     CHECKPOINT_RADIUS: int = (TRACK_WIDTH - 4) // 2
 
+    # A car is stopped after this many ticks without a new checkpoint or
+    # getting STALL_DISTANCE away from where it last progressed, 0 disables
+    STALL_TICKS: int = 2 * TICK_RATE
+    STALL_DISTANCE: float = TRACK_WIDTH
+
     TRACK_COLOR = (211, 176, 131, 255)
     BG_COLOR = (51, 51, 51, 255)
     CHECKPOINT_COLOR = (144, 82, 82, 255)
 
+    # Networks kept for genomes that come back unchanged, such as elites
+    NETWORK_CACHE_SIZE: int = 1024
+
+    # Replays keep the state of every car this often to seek quickly
+    REPLAY_KEYFRAME_TICKS: int = 5 * TICK_RATE
+
+    # Training telemetry counts the cars still driving this often
+    TELEMETRY_SAMPLE_TICKS: int = TICK_RATE // 2
+
     DRAW_RAYS: bool = True
 
 
 @dataclass
 class Debug:
     TRACK_NODES: bool = False
+    # Draws cars from primitives at their exact pose instead of sprites
+    CAR_SHAPES: bool = False
 
 
 class State:
     def __init__(self, track: Track) -> None:
         self.players: list[Controller] = []
+        self.car_batch: CarBatch = CarBatch()
         self.track: Track = track
 
 
 class Context:
-    def __init__(self) -> None:
+    def __init__(self, track: Track | None = None) -> None:
         self.constants: Constants = Constants()
         self.debug: Debug = Debug()
-        self.state: State = State(self._init_track())
+        self.state: State = State(self._init_track() if track is None else track)
 
     def _init_track(self) -> Track:
-        return Track(self.constants.WIDTH, self.constants.HEIGHT, 30)
+        return Track(
+            self.constants.WIDTH,
+            self.constants.HEIGHT,
+            self.constants.TRACK_CHECKPOINTS,
+            track_width=self.constants.TRACK_WIDTH,
+        )
 
     def add_player(self, player: Controller) -> None:
         self.state.players.append(player)
 
+    def clear_players(self) -> None:
+        self.state.players.clear()
+        self.state.car_batch.clear()
+
     @property
     def players(self) -> list[Controller]:
         return self.state.players
 
+    @property
+    def car_batch(self) -> CarBatch:
+        return self.state.car_batch
+
     @property
     def track(self) -> Track:
         return self.state.track
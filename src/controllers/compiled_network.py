@@ -0,0 +1,173 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
+from neat import activations, aggregations, nn
+
+
+def _tanh(z: np.ndarray) -> np.ndarray:
+    # Same scaling and clamping as neat.activations.tanh_activation
+    return np.tanh(np.clip(2.5 * z, -60.0, 60.0))
+
+
+@dataclass(frozen=True)
+class CompiledNetwork:
+    """A FeedForwardNetwork as dense layers of weights and biases.
+
+    Values are laid out as [inputs, 0.0, layer 1 nodes, layer 2 nodes, ...].
+    Layer l takes every value before it through weights[l]. Outputs the
+    network never evaluates read the constant 0.0, as activate returns them.
+    """
+
+    num_inputs: int
+    weights: tuple[np.ndarray, ...]
+    biases: tuple[np.ndarray, ...]
+    responses: tuple[np.ndarray, ...]
+    outputs: np.ndarray
+
+    @property
+    def widths(self) -> tuple[int, ...]:
+        return tuple(len(bias) for bias in self.biases)
+
+    @classmethod
+    def from_network(cls, net: nn.FeedForwardNetwork) -> CompiledNetwork:
+        num_inputs = len(net.input_nodes)
+        depth = {node: 0 for node in net.input_nodes}
+        for node, act_func, agg_func, _, _, links in net.node_evals:
+            if act_func is not activations.tanh_activation:
+                raise ValueError(f"Node {node}: only tanh activation compiles")
+            if agg_func is not aggregations.sum_aggregation:
+                raise ValueError(f"Node {node}: only sum aggregation compiles")
+            depth[node] = 1 + max((depth[i] for i, _ in links), default=0)
+
+        # Node evals are in topological order, so a node's layer is one past
+        # the deepest node feeding it
+        layers: list[list] = [[] for _ in range(max(depth.values(), default=0))]
+        for node_eval in net.node_evals:
+            layers[depth[node_eval[0]] - 1].append(node_eval)
+
+        index = {node: i for i, node in enumerate(net.input_nodes)}
+        zero = num_inputs
+        offset = num_inputs + 1
+        weights, biases, responses = [], [], []
+        for layer in layers:
+            weight = np.zeros((len(layer), offset))
+            for row, (node, _, _, _, _, links) in enumerate(layer):
+                for i, w in links:
+                    weight[row, index[i]] += w
+                index[node] = offset + row
+            weights.append(weight)
+            biases.append(np.array([node_eval[3] for node_eval in layer], dtype=float))
+            responses.append(
+                np.array([node_eval[4] for node_eval in layer], dtype=float)
+            )
+            offset += len(layer)
+
+        outputs = np.array([index.get(node, zero) for node in net.output_nodes])
+        return cls(num_inputs, tuple(weights), tuple(biases), tuple(responses), outputs)
+
+    def activate(self, inputs) -> np.ndarray:
+        """Outputs for one input vector, like FeedForwardNetwork.activate."""
+        inputs = np.asarray(inputs, dtype=float)[None]
+        return NetworkBatch([self]).activate(inputs, np.zeros(1, dtype=np.intp))[0]
+
+
+class NetworkBatch:
+    """Compiled networks packed so many of them run as a few batched matmuls.
+
+    Networks with the same number of inputs and layers form a group. Within a group
+    each layer is padded with zero weights to the widest member; padded
+    nodes evaluate to tanh(bias 0) = 0 and feed nothing, so packing does
+    not change any output.
+    """
+
+    def __init__(self, networks: list[CompiledNetwork]) -> None:
+        assert networks
+        self._num_outputs: int = len(networks[0].outputs)
+        self._groups: list[_NetworkGroup] = []
+        self._group_of: np.ndarray = np.zeros(len(networks), dtype=np.intp)
+        self._slot_of: np.ndarray = np.zeros(len(networks), dtype=np.intp)
+
+        by_shape: dict[tuple[int, int], list[int]] = {}
+        for i, network in enumerate(networks):
+            assert len(network.outputs) == self._num_outputs
+            shape = (network.num_inputs, len(network.weights))
+            by_shape.setdefault(shape, []).append(i)
+
+        for members in by_shape.values():
+            self._group_of[members] = len(self._groups)
+            self._slot_of[members] = np.arange(len(members))
+            self._groups.append(_NetworkGroup([networks[i] for i in members]))
+
+    def __len__(self) -> int:
+        return len(self._group_of)
+
+    @property
+    def num_groups(self) -> int:
+        return len(self._groups)
+
+    def activate(self, inputs: np.ndarray, members: np.ndarray) -> np.ndarray:
+        """Outputs of network members[m] for inputs[m], shaped (M, outputs).
+
+        Every member takes as many inputs as inputs has columns.
+        """
+        outputs = np.zeros((len(members), self._num_outputs))
+        groups = self._group_of[members]
+        for group_id in np.unique(groups).tolist():
+            selected = np.flatnonzero(groups == group_id)
+            slots = self._slot_of[members[selected]]
+            outputs[selected] = self._groups[group_id].activate(inputs[selected], slots)
+        return outputs
+
+
+class _NetworkGroup:
+    def __init__(self, networks: list[CompiledNetwork]) -> None:
+        num_inputs = networks[0].num_inputs
+        depth = len(networks[0].weights)
+        widths = [
+            max(network.widths[layer] for network in networks) for layer in range(depth)
+        ]
+        starts = np.cumsum([num_inputs + 1] + widths)
+        self._num_inputs: int = num_inputs
+        self._starts: np.ndarray = starts
+        self._weights: list[np.ndarray] = [
+            np.zeros((len(networks), width, start))
+            for width, start in zip(widths, starts)
+        ]
+        self._biases: list[np.ndarray] = [
+            np.zeros((len(networks), width)) for width in widths
+        ]
+        self._responses: list[np.ndarray] = [
+            np.zeros((len(networks), width)) for width in widths
+        ]
+        self._outputs: np.ndarray = np.zeros(
+            (len(networks), len(networks[0].outputs)), dtype=np.intp
+        )
+
+        for slot, network in enumerate(networks):
+            # Value index in the network's own layout -> index in the padded one
+            own_starts = np.cumsum((num_inputs + 1,) + network.widths)
+            remap = np.concatenate(
+                [np.arange(num_inputs + 1)]
+                + [
+                    starts[layer] + np.arange(width)
+                    for layer, width in enumerate(network.widths)
+                ]
+            )
+            for layer, width in enumerate(network.widths):
+                columns = remap[: own_starts[layer]]
+                self._weights[layer][slot][:width, columns] = network.weights[layer]
+                self._biases[layer][slot, :width] = network.biases[layer]
+                self._responses[layer][slot, :width] = network.responses[layer]
+            self._outputs[slot] = remap[network.outputs]
+
+    def activate(self, inputs: np.ndarray, slots: np.ndarray) -> np.ndarray:
+        values = np.zeros((len(slots), self._starts[-1]))
+        values[:, : self._num_inputs] = inputs
+        for layer, weight in enumerate(self._weights):
+            start = self._starts[layer]
+            end = self._starts[layer + 1]
+            summed = np.matmul(weight[slots], values[:, :start, None])[:, :, 0]
+            values[:, start:end] = _tanh(
+                self._biases[layer][slots] + self._responses[layer][slots] * summed
+            )
+        return values[np.arange(len(slots))[:, None], self._outputs[slots]]
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 
 from src.commands.command import *
+from src.commands.actions import IDLE_MOVEMENT, IDLE_STEER
 from src.vehicle.car import Car
 
 
@@ -8,6 +9,8 @@ class Controller(ABC):
     def __init__(self, car: Car) -> None:
         super().__init__()
         self._car: Car = car
+        # Steering and movement action indices chosen by the last handle_input
+        self.last_action: tuple[int, int] = (IDLE_STEER, IDLE_MOVEMENT)
 
     def __repr__(self) -> str:
         return self.__class__.__name__
@@ -16,6 +19,11 @@ class Controller(ABC):
     def handle_input(self) -> list[Command]:
         pass
 
+    @property
+    @abstractmethod
+    def score(self) -> float:
+        pass
+
     @abstractmethod
     def update_score(self) -> None:
         pass
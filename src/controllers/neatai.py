@@ -1,61 +1,109 @@
-import math
 import numpy as np
 from neat import nn
 
 from src.controllers.controller import Controller
 from src.vehicle.car import Car
+from src.vehicle.car_batch import CarBatch
+from src.tracks.track import Track
 from src.commands.command import *
-from src.vec.vec2 import Vec2
+from src.commands.actions import movement_commands, steering_commands
 
 
 class NeatAI(Controller):
-    def __init__(self, car: Car, genome, net: nn.FeedForwardNetwork) -> None:
+    # Indices into STEERING_ACTIONS and MOVEMENT_ACTIONS the network chooses from
+    STEERING: tuple[int, ...] = (1, 2, 3)
+    MOVEMENT: tuple[int, ...] = (0, 1, 2)
+
+    def __init__(
+        self, car: Car, genome, net: nn.FeedForwardNetwork, track: Track
+    ) -> None:
         super().__init__(car)
         self.genome = genome
         self.net: nn.FeedForwardNetwork = net
-        self._steering_commands: list[Command] = [
-            SteerLeft(self._car, 0.5),
-            # SteerLeft(self._car, 1.0),
-            # SteerRight(self._car, 1.0),
-            IdleSteer(self._car),
-            SteerRight(self._car, 0.5),
-        ]
-        self._movement_commands: list[Command] = [
-            MoveBackOrBreak(self._car, 0.2),
-            IdleMovement(self._car),
-            Accelerate(self._car, 0.3),
-        ]
-
-    def handle_input(self) -> list[Command]:
-        d = self._next_checkpoint_delta()
-        velocity = (
-            self._car._velocity / self._car.MAX_SPEED_FORWARD
-            if self._car._velocity < 0
-            else self._car._velocity / self._car.MAX_SPEED_BACKWARD
+        self._track: Track = track
+        self._output: list[float] | None = None
+        self._steering_commands: list[Command] = steering_commands(
+            self._car, NeatAI.STEERING
         )
-        # TODO: refacotor, 96 is max ray len
-        input = tuple(abs(ray) / 96 for ray in self._car.rays) + (
-            velocity,
-            self._car._steering_angle() / 45,
-            d.x / 100,
-            d.y / 100,
+        self._movement_commands: list[Command] = movement_commands(
+            self._car, NeatAI.MOVEMENT
         )
-        output = np.array(self.net.activate(input))
+
+    def handle_input(self) -> list[Command]:
+        if self._output is None:
+            inputs = NeatAI.batch_inputs(self._car.batch, np.array([self._car.row]))
+            output = self.net.activate(inputs[0].tolist())
+        else:
+            output, self._output = self._output, None
 
         # Outputs are in range (-1,1)
         steer_idx = round((output[0] + 1) / 2 * (len(self._steering_commands) - 1))
         movement_idx = round((output[1] + 1) / 2 * (len(self._movement_commands) - 1))
+        self.last_action = (NeatAI.STEERING[steer_idx], NeatAI.MOVEMENT[movement_idx])
 
         return [
             self._steering_commands[steer_idx],
             self._movement_commands[movement_idx],
         ]
 
+    def set_output(self, output: list[float]) -> None:
+        """Network output for the next handle_input, computed in a batch."""
+        self._output = output
+
+    @classmethod
+    def batch_inputs(cls, batch: CarBatch, rows: np.ndarray) -> np.ndarray:
+        """Network inputs of the cars in rows, shaped (len(rows), inputs).
+
+        The cars must share one ray count, as the rays are the first inputs.
+        """
+        num_rays = np.unique(batch.num_rays[rows])
+        if len(num_rays) > 1:
+            raise ValueError(f"Cars with {num_rays.tolist()} rays take mixed inputs")
+        velocity = batch.velocity[rows]
+        velocity = np.where(
+            velocity < 0,
+            velocity / Car.MAX_SPEED_FORWARD,
+            velocity / Car.MAX_SPEED_BACKWARD,
+        )
+        steering_angle = batch.steering_angle[rows]
+        d = batch.next_checkpoint[rows] - batch.pos[rows]
+        d[np.isnan(d[:, 0])] = 0.0
+
+        # TODO: refacotor, 96 is max ray len
+        return np.column_stack(
+            (
+                batch.ray_lengths[rows, : num_rays[0]] / 96,
+                velocity,
+                steering_angle / 45,
+                d[:, 0] / 100,
+                d[:, 1] / 100,
+            )
+        )
+
+    @property
+    def score(self) -> float:
+        return self.genome.fitness
+
     def update_score(self) -> None:
-        self.genome.fitness = self._car.checkpoints_matched * 10
-        d = self._next_checkpoint_delta()
-        dist = math.hypot(d.x, d.y) / 100
-        self.genome.fitness -= dist
+        rows = np.array([self._car.row])
+        scores = NeatAI.batch_scores(self._car.batch, rows, self._track)
+        self.genome.fitness = float(scores[0])
+
+    @classmethod
+    def batch_scores(
+        cls, batch: CarBatch, rows: np.ndarray, track: Track
+    ) -> np.ndarray:
+        """Fitness of the cars in rows, shaped (len(rows),).
+
+        10 per checkpoint matched, minus the distance along the track to the
+        next checkpoint in hundreds of pixels.
+        """
+        arc_lengths = track.checkpoint_arc_lengths()
+        index = track.progress_index()
+        checkpoints = batch.checkpoints[rows]
+        target = arc_lengths[checkpoints % len(arc_lengths)]
+        progress = index.progress(batch.pos[rows], target)
+        return checkpoints * 10 - index.wrap(target - progress) / 100
 
     def add_score(self, value: int) -> None:
         self.genome.fitness += value
@@ -63,13 +111,6 @@ class NeatAI(Controller):
     def deactivate(self) -> None:
         return super().deactivate()
 
-    def _next_checkpoint_delta(self) -> Vec2:
-        if not self._car.next_checkpoint:
-            return Vec2(0, 0)
-        dx = self._car.next_checkpoint.x - self._car._pos.x
-        dy = self._car.next_checkpoint.y - self._car._pos.y
-        return Vec2(dx, dy)
-
     @staticmethod
     def softmax(nums: np.ndarray) -> np.ndarray:
         return np.exp(nums) / np.sum(np.exp(nums), axis=0)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from src.controllers.compiled_network import CompiledNetwork, NetworkBatch
+from src.controllers.neatai import NeatAI
+from src.tracks.track import Track
+from src.vehicle.car_batch import CarBatch
+
+
+class NeatAIBatch:
+    """Runs the networks of many NeatAI controllers in one pass per tick.
+
+    Each network is compiled to dense layers once, then every tick gathers
+    the inputs of all active cars from the batch arrays and hands each
+    controller its output before handle_input.
+    """
+
+    def __init__(
+        self,
+        controllers: list[NeatAI],
+        networks: list[CompiledNetwork] | None = None,
+    ) -> None:
+        self._controllers: list[NeatAI] = controllers
+        self._rows: np.ndarray = np.array([c._car.row for c in controllers])
+        self._networks: NetworkBatch = NetworkBatch(
+            [CompiledNetwork.from_network(c.net) for c in controllers]
+            if networks is None
+            else networks
+        )
+
+    @property
+    def networks(self) -> NetworkBatch:
+        return self._networks
+
+    def update(self, batch: CarBatch) -> None:
+        members = np.flatnonzero(batch.active[self._rows])
+        if not members.size:
+            return
+        # Cars with different ray counts take different numbers of inputs
+        num_rays = batch.num_rays[self._rows[members]]
+        for n in np.unique(num_rays).tolist():
+            group = members[num_rays == n]
+            inputs = NeatAI.batch_inputs(batch, self._rows[group])
+            outputs = self._networks.activate(inputs, group)
+            for i, output in zip(group.tolist(), outputs.tolist()):
+                self._controllers[i].set_output(output)
+
+    def update_scores(self, batch: CarBatch, track: Track) -> None:
+        """Scores every active car at once, as NeatAI.update_score would."""
+        members = np.flatnonzero(batch.active[self._rows])
+        if not members.size:
+            return
+        scores = NeatAI.batch_scores(batch, self._rows[members], track)
+        for i, score in zip(members.tolist(), scores.tolist()):
+            self._controllers[i].genome.fitness = score
@@ -0,0 +1,82 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+import time
+from neat import nn
+
+from src.controllers.compiled_network import CompiledNetwork
+
+
+@dataclass(frozen=True)
+class NetworkCacheStats:
+    hits: int = 0
+    misses: int = 0
+    compile_sec: float = 0.0
+
+    def __add__(self, other: NetworkCacheStats) -> NetworkCacheStats:
+        return NetworkCacheStats(
+            self.hits + other.hits,
+            self.misses + other.misses,
+            self.compile_sec + other.compile_sec,
+        )
+
+
+class NetworkCache:
+    """Least recently used cache of networks built from genomes.
+
+    Genomes are keyed by their nodes and enabled connections with all their
+    parameters, so elites and other unchanged genomes reuse the network of
+    an earlier generation. Every genome must come from the same config.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity: int = capacity
+        self._networks: OrderedDict[
+            tuple, tuple[nn.FeedForwardNetwork, CompiledNetwork]
+        ] = OrderedDict()
+        self._stats: NetworkCacheStats = NetworkCacheStats()
+
+    def __len__(self) -> int:
+        return len(self._networks)
+
+    @classmethod
+    def key(cls, genome) -> tuple:
+        nodes = tuple(
+            sorted(
+                (key, node.bias, node.response, node.activation, node.aggregation)
+                for key, node in genome.nodes.items()
+            )
+        )
+        connections = tuple(
+            sorted(
+                (key, connection.weight)
+                for key, connection in genome.connections.items()
+                if connection.enabled
+            )
+        )
+        return nodes, connections
+
+    def get(self, genome, config) -> tuple[nn.FeedForwardNetwork, CompiledNetwork]:
+        key = NetworkCache.key(genome)
+        networks = self._networks.get(key)
+        if networks is not None:
+            self._networks.move_to_end(key)
+            self._stats += NetworkCacheStats(hits=1)
+            return networks
+
+        start = time.perf_counter()
+        net = nn.FeedForwardNetwork.create(genome, config)
+        networks = net, CompiledNetwork.from_network(net)
+        self._stats += NetworkCacheStats(
+            misses=1, compile_sec=time.perf_counter() - start
+        )
+
+        self._networks[key] = networks
+        if len(self._networks) > self._capacity:
+            self._networks.popitem(last=False)
+        return networks
+
+    def take_stats(self) -> NetworkCacheStats:
+        """Counts since the last call."""
+        stats, self._stats = self._stats, NetworkCacheStats()
+        return stats
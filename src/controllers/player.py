@@ -2,6 +2,7 @@ import raylib as rl
 from src.controllers.controller import Controller
 from src.vehicle.car import Car
 from src.commands.command import *
+from src.commands.actions import *
 
 
 class Player(Controller):
@@ -10,27 +11,27 @@ class Player(Controller):
         self._score: int = 0
 
     def handle_input(self) -> list[Command]:
-        commands: list[Command] = []
+        steer = IDLE_STEER
         if rl.IsKeyDown(rl.KEY_A):
-            if rl.IsKeyDown(rl.KEY_LEFT_SHIFT):
-                commands.append(SteerLeft(self._car, 1.0))
-            else:
-                commands.append(SteerLeft(self._car, 0.5))
+            steer = 0 if rl.IsKeyDown(rl.KEY_LEFT_SHIFT) else 1
         elif rl.IsKeyDown(rl.KEY_D):
-            if rl.IsKeyDown(rl.KEY_LEFT_SHIFT):
-                commands.append(SteerRight(self._car, 1.0))
-            else:
-                commands.append(SteerRight(self._car, 0.5))
-        else:
-            commands.append(IdleSteer(self._car))
+            steer = 4 if rl.IsKeyDown(rl.KEY_LEFT_SHIFT) else 3
 
+        movement = IDLE_MOVEMENT
         if rl.IsMouseButtonDown(rl.MOUSE_BUTTON_LEFT):
-            commands.append(Accelerate(self._car, 0.3))
+            movement = 2
         elif rl.IsMouseButtonDown(rl.MOUSE_BUTTON_RIGHT):
-            commands.append(MoveBackOrBreak(self._car, 0.2))
-        else:
-            commands.append(IdleMovement(self._car))
-        return commands
+            movement = 0
+
+        self.last_action = (steer, movement)
+        return [
+            STEERING_ACTIONS[steer](self._car),
+            MOVEMENT_ACTIONS[movement](self._car),
+        ]
+
+    @property
+    def score(self) -> float:
+        return self._score
 
     def update_score(self) -> None:
         self._score = self._car.checkpoints_matched
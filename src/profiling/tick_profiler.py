@@ -0,0 +1,92 @@
+import csv
+import json
+import time
+import numpy as np
+
+
+class TickProfiler:
+    """Wall time of every phase of the last capacity ticks, in a ring buffer.
+
+    A tick starts with begin_tick and every phase ends with lap, which
+    charges the time since the previous lap to it. Phases not following
+    another one call restart first. Draw time lands on the tick the frame
+    was drawn after. Code holding None instead of a profiler skips all of
+    it, so profiling off costs one comparison per phase.
+    """
+
+    PHASES: tuple[str, ...] = (
+        "networks",
+        "input",
+        "checkpoints",
+        "rays",
+        "physics",
+        "score",
+        "draw",
+    )
+    NETWORKS: int = 0
+    INPUT: int = 1
+    CHECKPOINTS: int = 2
+    RAYS: int = 3
+    PHYSICS: int = 4
+    SCORE: int = 5
+    DRAW: int = 6
+
+    def __init__(self, capacity: int = 600) -> None:
+        assert capacity > 0
+        self._times: np.ndarray = np.zeros((capacity, len(self.PHASES)))
+        self._ticks: int = 0
+        self._row: int = 0
+        self._last: float = time.perf_counter()
+
+    @property
+    def ticks(self) -> int:
+        return self._ticks
+
+    def begin_tick(self) -> None:
+        self._row = self._ticks % len(self._times)
+        self._times[self._row] = 0.0
+        self._ticks += 1
+        self._last = time.perf_counter()
+
+    def restart(self) -> None:
+        self._last = time.perf_counter()
+
+    def lap(self, phase: int) -> None:
+        now = time.perf_counter()
+        self._times[self._row, phase] += now - self._last
+        self._last = now
+
+    def recent(self) -> tuple[np.ndarray, np.ndarray]:
+        """Tick numbers and per phase seconds of the kept ticks, oldest first."""
+        capacity = len(self._times)
+        first = max(self._ticks - capacity, 0)
+        ticks = np.arange(first, self._ticks)
+        return ticks, self._times[ticks % capacity]
+
+    def mean_ms(self) -> np.ndarray:
+        """Mean milliseconds per tick of every phase over the kept ticks."""
+        _, times = self.recent()
+        if not len(times):
+            return np.zeros(len(self.PHASES))
+        return times.mean(axis=0) * 1000
+
+    def dump(self, path: str) -> None:
+        """Writes the kept ticks to a .csv file, or JSON for any other name."""
+        ticks, times = self.recent()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(("tick",) + tuple(f"{p}_ms" for p in self.PHASES))
+                for tick, row in zip(ticks.tolist(), (times * 1000).tolist()):
+                    writer.writerow([tick] + row)
+        else:
+            with open(path, "w") as file:
+                json.dump(
+                    {
+                        "phases": list(self.PHASES),
+                        "ticks": ticks.tolist(),
+                        "ms": (times * 1000).tolist(),
+                        "mean_ms": dict(zip(self.PHASES, self.mean_ms().tolist())),
+                    },
+                    file,
+                )
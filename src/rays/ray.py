@@ -8,7 +8,7 @@ class Ray:
         self._angle_deg: float = angle_deg
         self._angle_deg_relative: float = angle_deg
 
-        self._hit: Vec2 | None = None
+        self._length: float | None = None
 
     @property
     def origin(self) -> Vec2:
@@ -20,11 +20,20 @@ class Ray:
 
     @property
     def hit(self) -> Vec2 | None:
-        return self._hit
+        if self._length is None:
+            return None
+        angle_rad = math.radians(self._angle_deg)
+        return self._origin.added(
+            math.cos(angle_rad) * self._length, math.sin(angle_rad) * self._length
+        )
 
-    @hit.setter
-    def hit(self, value: Vec2) -> None:
-        self._hit = value
+    @property
+    def length(self) -> float | None:
+        return self._length
+
+    @length.setter
+    def length(self, value: float) -> None:
+        self._length = value
 
     @property
     def angle_deg_relative(self) -> float:
@@ -46,6 +55,6 @@ class Ray:
         return f"{self.origin} -> {self.hit}\n"
 
     def __abs__(self) -> float:
-        if not self.hit:
+        if self._length is None:
             return 0.0
-        return math.hypot(self.hit.x - self.origin.x, self.hit.y - self.origin.y)
+        return self._length
@@ -0,0 +1,175 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
+
+from src.commands.actions import MOVEMENT_ACTIONS
+from src.contexts.context import Context
+from src.controllers.controller import Controller
+from src.tracks.graph_structs import TrackNode
+from src.tracks.track import Track
+from src.vehicle.car_batch import CarBatch
+
+
+@dataclass(frozen=True)
+class Replay:
+    """Commands every car took, enough to drive the same run again.
+
+    actions holds one byte per tick and car: the steering action index times
+    the number of movement actions plus the movement action index, or
+    INACTIVE for a car that did not move that tick. keyframes hold the
+    physics state of every car at ticks 0, keyframe_ticks, 2 * keyframe_ticks,
+    ..., keyframe 0 being the starting poses.
+    """
+
+    INACTIVE = 255
+    # pos x, pos y, rotation_degree, velocity, cor_y, steering_angle
+    KEYFRAME_FIELDS = 6
+
+    seed: int | None
+    size: tuple[int, int]
+    track_width: int
+    nodes: np.ndarray
+    actions: np.ndarray
+    keyframe_ticks: int
+    keyframes: np.ndarray
+
+    @property
+    def num_ticks(self) -> int:
+        return len(self.actions)
+
+    @property
+    def num_cars(self) -> int:
+        return self.actions.shape[1]
+
+    @classmethod
+    def encode(cls, steer: int, movement: int) -> int:
+        return steer * len(MOVEMENT_ACTIONS) + movement
+
+    @classmethod
+    def decode(cls, action: int) -> tuple[int, int]:
+        steer, movement = divmod(action, len(MOVEMENT_ACTIONS))
+        return steer, movement
+
+    def track(self) -> Track:
+        nodes = [TrackNode(x, y) for x, y in self.nodes.tolist()]
+        return Track.from_nodes(*self.size, nodes, self.track_width)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as file:
+            np.savez_compressed(
+                file,
+                seed=np.array(-1 if self.seed is None else self.seed),
+                size=np.array(self.size),
+                track_width=np.array(self.track_width),
+                nodes=self.nodes,
+                actions=self.actions,
+                keyframe_ticks=np.array(self.keyframe_ticks),
+                keyframes=self.keyframes,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> Replay:
+        with np.load(path) as data:
+            seed = int(data["seed"])
+            width, height = data["size"].tolist()
+            return cls(
+                None if seed < 0 else seed,
+                (width, height),
+                int(data["track_width"]),
+                data["nodes"],
+                data["actions"],
+                int(data["keyframe_ticks"]),
+                data["keyframes"],
+            )
+
+    @classmethod
+    def keyframe(cls, batch: CarBatch, rows: np.ndarray) -> np.ndarray:
+        """Physics state of the cars in rows, shaped (len(rows), KEYFRAME_FIELDS)."""
+        return np.column_stack(
+            (
+                batch.pos[rows],
+                batch.rotation_degree[rows],
+                batch.velocity[rows],
+                batch.cor_y[rows],
+                batch.steering_angle[rows],
+            )
+        )
+
+    @classmethod
+    def restore(cls, batch: CarBatch, rows: np.ndarray, keyframe: np.ndarray) -> None:
+        batch.pos[rows] = keyframe[:, 0:2]
+        batch.prev_pos[rows] = keyframe[:, 0:2]
+        batch.rotation_degree[rows] = keyframe[:, 2]
+        batch.velocity[rows] = keyframe[:, 3]
+        batch.cor_y[rows] = keyframe[:, 4]
+        batch.steering_angle[rows] = keyframe[:, 5]
+        batch.dirty[rows] = True
+
+
+class ReplayRecorder:
+    """Records the chosen action of every car, tick by tick, into a Replay.
+
+    Actions go into fixed size uint8 chunks, so a tick costs one row write
+    and a long run never copies what it already recorded.
+    """
+
+    CHUNK_TICKS: int = 1024
+
+    def __init__(self, keyframe_ticks: int, seed: int | None = None) -> None:
+        assert keyframe_ticks > 0
+        self._keyframe_ticks: int = keyframe_ticks
+        self._seed: int | None = seed
+        self._players: list[Controller] = []
+        self._rows: np.ndarray = np.zeros(0, dtype=np.intp)
+        self._chunks: list[np.ndarray] = []
+        self._keyframes: list[np.ndarray] = []
+        self._tick: int = 0
+
+    @property
+    def num_ticks(self) -> int:
+        return self._tick
+
+    def start(self, ctx: Context) -> None:
+        """Begins a new recording of the cars of ctx.players at their poses now."""
+        self._players = list(ctx.players)
+        self._rows = np.array([player._car.row for player in self._players])
+        self._chunks = []
+        self._keyframes = [Replay.keyframe(ctx.car_batch, self._rows)]
+        self._tick = 0
+
+    def record(self, ctx: Context) -> None:
+        """Records a finished tick, call after the batch moved the cars."""
+        chunk_tick = self._tick % self.CHUNK_TICKS
+        if chunk_tick == 0:
+            self._chunks.append(
+                np.full((self.CHUNK_TICKS, len(self._rows)), Replay.INACTIVE, np.uint8)
+            )
+        # Cars the collider stopped this tick did not move, their commands
+        # changed nothing a replay can see
+        moved = ctx.car_batch.active[self._rows]
+        actions = self._chunks[-1][chunk_tick]
+        for i, player in enumerate(self._players):
+            if moved[i]:
+                actions[i] = Replay.encode(*player.last_action)
+
+        self._tick += 1
+        if self._tick % self._keyframe_ticks == 0:
+            self._keyframes.append(Replay.keyframe(ctx.car_batch, self._rows))
+
+    def replay(self, ctx: Context) -> Replay:
+        actions = (
+            np.concatenate(self._chunks)[: self._tick]
+            if self._chunks
+            else np.zeros((0, len(self._rows)), dtype=np.uint8)
+        )
+        track = ctx.track
+        nodes = np.array([node.as_tuple() for node in track.edges_to_sorted_nodes()])
+        return Replay(
+            self._seed,
+            (ctx.constants.WIDTH, ctx.constants.HEIGHT),
+            track.track_width,
+            nodes,
+            actions,
+            self._keyframe_ticks,
+            np.stack(self._keyframes),
+        )
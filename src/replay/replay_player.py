@@ -0,0 +1,88 @@
+import numpy as np
+
+from src.commands.actions import MOVEMENT_ACTIONS, STEERING_ACTIONS
+from src.commands.command import Command
+from src.replay.replay import Replay
+from src.vehicle.car import Car
+from src.vehicle.car_batch import CarBatch
+
+
+class ReplayPlayer:
+    """Drives the cars of a Replay again through the car physics alone.
+
+    No networks, sensors or collisions run, the recorded actions say what
+    every car did and when it stopped. Seeking restores the nearest keyframe
+    before the tick and replays at most keyframe_ticks ticks from there.
+    """
+
+    def __init__(self, replay: Replay, batch: CarBatch | None = None) -> None:
+        self._replay: Replay = replay
+        self._batch: CarBatch = CarBatch(replay.num_cars) if batch is None else batch
+        self._cars: list[Car] = [
+            Car(x, y, rotation, batch=self._batch)
+            for x, y, rotation in replay.keyframes[0][:, :3].tolist()
+        ]
+        self._rows: np.ndarray = np.array([car.row for car in self._cars])
+        self._steering: list[list[Command]] = [
+            [steering(car) for steering in STEERING_ACTIONS] for car in self._cars
+        ]
+        self._movement: list[list[Command]] = [
+            [movement(car) for movement in MOVEMENT_ACTIONS] for car in self._cars
+        ]
+        self._tick: int = 0
+        self.seek(0)
+
+    @property
+    def replay(self) -> Replay:
+        return self._replay
+
+    @property
+    def cars(self) -> list[Car]:
+        return self._cars
+
+    @property
+    def tick(self) -> int:
+        return self._tick
+
+    def done(self) -> bool:
+        return self._tick >= self._replay.num_ticks
+
+    def seek(self, tick: int) -> None:
+        tick = min(max(tick, 0), self._replay.num_ticks)
+        keyframe = min(
+            tick // self._replay.keyframe_ticks, len(self._replay.keyframes) - 1
+        )
+        Replay.restore(self._batch, self._rows, self._replay.keyframes[keyframe])
+        self._tick = keyframe * self._replay.keyframe_ticks
+        self._batch.active[self._rows] = (
+            self._replay.actions[self._tick - 1] != Replay.INACTIVE
+            if self._tick > 0
+            else True
+        )
+        while self._tick < tick:
+            self.step()
+
+    def step(self) -> None:
+        if self.done():
+            return
+        actions = self._replay.actions[self._tick]
+        moving = actions != Replay.INACTIVE
+        for i in np.flatnonzero(moving).tolist():
+            steer, movement = Replay.decode(int(actions[i]))
+            self._steering[i][steer].execute()
+            self._movement[i][movement].execute()
+        self._batch.active[self._rows] = moving
+        self._batch.update(self._rows[moving])
+        self._tick += 1
+
+    def trajectory(self, car: int) -> np.ndarray:
+        """Positions of one car from the start to the end, shaped (ticks + 1, 2)."""
+        tick = self._tick
+        self.seek(0)
+        row = self._rows[car]
+        positions = [self._batch.pos[row].copy()]
+        while not self.done():
+            self.step()
+            positions.append(self._batch.pos[row].copy())
+        self.seek(tick)
+        return np.array(positions)
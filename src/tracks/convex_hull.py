@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+import numpy as np
+
 from src.tracks.graph_structs import TrackNode, TrackEdge
 
 
@@ -20,31 +22,86 @@ class ConvexHullMethod(ABC):
 
 
 class QuickHull(ConvexHullMethod):
+    """QuickHull over coordinate arrays, partitioning with NumPy masks.
+
+    Points on a hull edge but not at a corner are inner nodes. The loop
+    starts at the same node and runs the same way as GrahamScan's.
+    """
+
     def __init__(self) -> None:
         super().__init__()
 
     def connect(self, nodes: list[TrackNode]) -> ConvexHullResult:
-        import numpy as np
+        from itertools import pairwise
+
+        if len(nodes) < 3:
+            return ConvexHullResult([], [])
 
-        xs = np.array(list(map(lambda node: node.x, nodes)))
-        minx = np.min(xs)
-        maxx = np.max(xs)
-        # TODO
-        return ConvexHullResult([], [])
+        points = np.array([node.as_tuple() for node in nodes])
+        hull = QuickHull.hull_indices(points).tolist()
+        convex_nodes = [nodes[i] for i in hull + hull[:1]]
+        convex_edges = [TrackEdge(src, dst) for src, dst in pairwise(convex_nodes)]
+
+        inner = np.ones(len(nodes), dtype=bool)
+        inner[hull] = False
+        inner_nodes = [nodes[i] for i in np.flatnonzero(inner).tolist()]
+        return ConvexHullResult(convex_edges, inner_nodes)
+
+    @classmethod
+    def hull_indices(cls, points: np.ndarray) -> np.ndarray:
+        """Indices of the hull corners of points, shaped (n, 2), in loop order."""
+        xs = points[:, 0]
+        ys = points[:, 1]
+        # Most bottom, then most right, as GrahamScan starts
+        bottom = np.flatnonzero(ys == ys.max())
+        start = int(bottom[np.argmax(xs[bottom])])
+        # Opposite end: most top, then most left
+        top = np.flatnonzero(ys == ys.min())
+        end = int(top[np.argmin(xs[top])])
+        if start == end:
+            return np.array([start])
+
+        everything = np.arange(len(points))
+        side = QuickHull._cross(points, start, end, everything)
+        # Each segment holds the points strictly on its outer side. The
+        # stack replaces recursion, which a hull of many corners overflows
+        hull: list[int] = []
+        stack = [(end, start, everything[side < 0]), (start, end, everything[side > 0])]
+        while stack:
+            a, b, candidates = stack.pop()
+            if not candidates.size:
+                hull.append(a)
+                continue
+            distances = QuickHull._cross(points, a, b, candidates)
+            far = int(candidates[np.argmax(distances)])
+            stack.append(
+                (far, b, candidates[QuickHull._cross(points, far, b, candidates) > 0])
+            )
+            stack.append(
+                (a, far, candidates[QuickHull._cross(points, a, far, candidates) > 0])
+            )
+
+        loop = np.array(hull)
+        if QuickHull._area(points[loop]) > 0:
+            loop = np.concatenate((loop[:1], loop[:0:-1]))
+        return loop
+
+    @classmethod
+    def _cross(
+        cls, points: np.ndarray, a: int, b: int, candidates: np.ndarray
+    ) -> np.ndarray:
+        # Twice the signed area of (a, b, candidate), positive to the left of a->b
+        ax, ay = points[a].tolist()
+        bx, by = points[b].tolist()
+        px = points[candidates, 0]
+        py = points[candidates, 1]
+        return (bx - ax) * (py - ay) - (by - ay) * (px - ax)
 
     @classmethod
-    def _in_triangle(
-        cls, triangle: tuple[TrackNode, TrackNode, TrackNode], node: TrackNode
-    ) -> bool:
-        a, b, c = triangle
-        signs = [
-            ConvexHullMethod._sign(node, a, b),
-            ConvexHullMethod._sign(node, b, c),
-            ConvexHullMethod._sign(node, c, a),
-        ]
-        has_neg = True in [x < 0 for x in signs]
-        has_pos = True in [x > 0 for x in signs]
-        return not (has_neg and has_pos)
+    def _area(cls, loop: np.ndarray) -> float:
+        xs = loop[:, 0]
+        ys = loop[:, 1]
+        return float(np.dot(xs, np.roll(ys, -1)) - np.dot(np.roll(xs, -1), ys)) / 2
 
 
 class GrahamScan(ConvexHullMethod):
@@ -73,7 +130,8 @@ class GrahamScan(ConvexHullMethod):
 
         convex_stack.append(p0)
         convex_edges = [TrackEdge(src, dst) for src, dst in pairwise(convex_stack)]
-        inner_nodes = list(filter(lambda node: not node in convex_stack, nodes))
+        hull = set(convex_stack)
+        inner_nodes = [node for node in nodes if node not in hull]
         return ConvexHullResult(convex_edges, inner_nodes)
 
     @classmethod
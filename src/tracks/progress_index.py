@@ -0,0 +1,148 @@
+import math
+import numpy as np
+
+from src.collision.segment_grid import SegmentGrid
+
+
+class ProgressIndex:
+    """Maps positions to arc length along a closed centreline.
+
+    A SegmentGrid lists, for every cell, the centreline segments that come
+    within radius of it. A batch of positions looks up its cells and
+    projects onto all their candidates in one flat pass.
+    Positions further than radius from every candidate fall back to all
+    segments.
+
+    Where the track crosses itself a position can be on the road of two
+    passes, far apart along the track. The nearest point of each pass is a
+    candidate, and a hint arc length per position picks the one closer to
+    it along the track. Everywhere else the nearest point wins.
+    """
+
+    def __init__(
+        self,
+        centreline: np.ndarray,
+        arc_length: np.ndarray,
+        track_width: float,
+        cell_size: int | None = None,
+    ) -> None:
+        self._starts: np.ndarray = centreline[:-1]
+        self._edges: np.ndarray = np.diff(centreline, axis=0)
+        self._lengths: np.ndarray = np.diff(arc_length)
+        self._arc_starts: np.ndarray = arc_length[:-1]
+        self._length: float = float(arc_length[-1])
+        self._on_road: float = track_width / 2
+        # Reaches past the kerbs as far as the checkpoint gates do
+        self._radius: float = 0.75 * track_width
+        # Points of one pass on the road at the same position are closer
+        # than this along the track, unless it turns tighter than the road
+        self._pass_gap: float = math.pi * track_width
+        if cell_size is None:
+            cell_size = max(int(track_width // 2), 1)
+        # Enough cells of margin that every point within radius of a segment
+        # falls in a cell listing it
+        self._grid: SegmentGrid = SegmentGrid(
+            centreline[:-1],
+            centreline[1:],
+            cell_size,
+            margin=math.ceil(self._radius / cell_size),
+        )
+
+    @property
+    def length(self) -> float:
+        return self._length
+
+    def wrap(self, distance: np.ndarray) -> np.ndarray:
+        """Arc length differences wrapped into [-length / 2, length / 2)."""
+        half = self._length / 2
+        return (distance + half) % self._length - half
+
+    def progress(
+        self, points: np.ndarray, hints: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Arc length of the centreline point nearest to each of points."""
+        return self._nearest(points, hints)[0]
+
+    def distance(self, points: np.ndarray) -> np.ndarray:
+        """Distance from each of points to the centreline."""
+        return self._nearest(points, None)[1]
+
+    def _nearest(
+        self, points: np.ndarray, hints: np.ndarray | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        owners, segments = self._grid.candidates(points[:, None, :])
+        counts = np.bincount(owners, minlength=len(points))
+        arcs, distances = self._project(points, owners, segments, hints, counts)
+
+        lost = ~(distances <= self._radius)
+        if lost.any():
+            num_lost = int(lost.sum())
+            num_segments = len(self._starts)
+            arcs[lost], distances[lost] = self._project(
+                points[lost],
+                np.repeat(np.arange(num_lost), num_segments),
+                np.tile(np.arange(num_segments), num_lost),
+                None if hints is None else hints[lost],
+                np.full(num_lost, num_segments),
+            )
+        return arcs, distances
+
+    def _project(
+        self,
+        points: np.ndarray,
+        owners: np.ndarray,
+        segments: np.ndarray,
+        hints: np.ndarray | None,
+        counts: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # Candidate segments of all points flattened, segments[i] belongs to
+        # points[owners[i]]. Returns the arc length and distance of the best
+        # candidate per point, distance inf for points without any
+        starts = self._starts[segments]
+        edges = self._edges[segments]
+        lengths = self._lengths[segments]
+        offsets = points[owners] - starts
+        t = (offsets[:, 0] * edges[:, 0] + offsets[:, 1] * edges[:, 1]) / lengths**2
+        t = np.clip(t, 0.0, 1.0)
+        distances = np.hypot(
+            offsets[:, 0] - t * edges[:, 0], offsets[:, 1] - t * edges[:, 1]
+        )
+        arcs = self._arc_starts[segments] + t * lengths
+
+        found = counts > 0
+        best = self._first_smallest(distances, owners, counts)
+        if hints is not None and best.size:
+            # The nearest candidate on the road of another pass over the
+            # same spot, taken instead when it is closer to the hint
+            nearest = np.repeat(arcs[best], counts[found])
+            other_pass = (distances <= self._on_road) & (
+                np.abs(self.wrap(arcs - nearest)) > self._pass_gap
+            )
+            other = self._first_smallest(
+                np.where(other_pass, distances, np.inf), owners, counts
+            )
+            point_hints = hints[found]
+            closer = np.abs(self.wrap(arcs[other] - point_hints)) < np.abs(
+                self.wrap(arcs[best] - point_hints)
+            )
+            best = np.where(other_pass[other] & closer, other, best)
+
+        best_arcs = np.zeros(len(points))
+        best_distances = np.full(len(points), np.inf)
+        best_arcs[found] = arcs[best] % self._length
+        best_distances[found] = distances[best]
+        return best_arcs, best_distances
+
+    @classmethod
+    def _first_smallest(
+        cls, key: np.ndarray, owners: np.ndarray, counts: np.ndarray
+    ) -> np.ndarray:
+        # Index of the first candidate with the smallest key, for every point
+        # with candidates
+        found = counts > 0
+        firsts = (np.cumsum(counts) - counts)[found]
+        smallest = np.minimum.reduceat(key, firsts) if firsts.size else key[:0]
+        ties = np.flatnonzero(key == np.repeat(smallest, counts[found]))
+        first = np.ones(len(ties), dtype=bool)
+        first[1:] = owners[ties[1:]] != owners[ties[:-1]]
+        return ties[first]
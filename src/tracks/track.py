@@ -2,7 +2,6 @@
 # https://bitesofcode.wordpress.com/2020/04/09/procedural-racetrack-generation/
 
 from __future__ import annotations
-from functools import cache
 import random
 import math
 import numpy as np
@@ -10,21 +9,65 @@ import numpy as np
 from src.tracks.graph_structs import TrackNode, TrackEdge
 from src.tracks.convex_hull import ConvexHullMethod, GrahamScan
 from src.tracks.displace_methods import DisplaceMethod, DisplaceAlongNormal
+from src.tracks.progress_index import ProgressIndex
 from src.vec.vec2 import Vec2
 
 
 class Track:
+    """Procedural closed track, indexed once its edges are final.
+
+    The node loop, checkpoints, centreline with its cumulative arc length
+    and per segment tangents and normals are plain arrays on the instance,
+    so they go away with the track.
+    """
+
+    SPLINE_DIVISIONS: int = 24
+    # Boundary walls inside the road are clipped to within this many pixels
+    BOUNDARY_CLIP_STEP: float = 0.5
+
     def __init__(
         self,
         width: int,
         height: int,
         checkpoints: int,
         displace_method: DisplaceMethod | None = None,
+        track_width: int = 64,
+        seed: int | None = None,
+    ) -> None:
+        self._init_fields(
+            width, height, checkpoints, displace_method, track_width, seed
+        )
+        self._generate_nodes(width, height, checkpoints)
+        self._make_convex_hull(GrahamScan())
+        self._insert_one_middle()
+        self._displace()
+        self._index()
+
+    @classmethod
+    def from_nodes(
+        cls, width: int, height: int, nodes: list[TrackNode], track_width: int = 64
+    ) -> Track:
+        """Rebuilds a track from its closed loop of nodes, the start repeated last."""
+        track = cls.__new__(cls)
+        track._init_fields(width, height, len(nodes) - 1, None, track_width, None)
+        track._edges = [TrackEdge(src, dst) for src, dst in zip(nodes, nodes[1:])]
+        track._index()
+        return track
+
+    def _init_fields(
+        self,
+        width: int,
+        height: int,
+        checkpoints: int,
+        displace_method: DisplaceMethod | None,
+        track_width: int,
+        seed: int | None,
     ) -> None:
         assert checkpoints > 2
         self._checkpoints: int = checkpoints
         self._width: int = width
         self._height: int = height
+        self._track_width: int = track_width
         self._offset_x: int = width // 8
         self._offset_y: int = height // 8
         self._displace_method: DisplaceMethod = (
@@ -39,11 +82,23 @@ class Track:
         self._edges: list[TrackEdge] = []
         self._inner_nodes: list[TrackNode] = []
         self._track_nodes: list[TrackNode] = []
+        self._random: random.Random = random.Random(seed)
 
-        self._generate_nodes(width, height, checkpoints)
-        self._make_convex_hull(GrahamScan())
-        self._insert_one_middle()
-        self._displace()
+        self._sorted_nodes: list[TrackNode] = []
+        self._checkpoint_positions: np.ndarray = np.zeros((0, 2))
+        self._checkpoint_gates: tuple[np.ndarray, np.ndarray] = (
+            np.zeros((0, 2)),
+            np.zeros((0, 2)),
+        )
+        self._spline_points: np.ndarray = np.zeros((0, 2))
+        self._centreline: np.ndarray = np.zeros((0, 2))
+        self._arc_length: np.ndarray = np.zeros(0)
+        self._tangents: np.ndarray = np.zeros((0, 2))
+        self._normals: np.ndarray = np.zeros((0, 2))
+        self._checkpoint_arc_lengths: np.ndarray = np.zeros(0)
+        self._progress_index: ProgressIndex | None = None
+        self._boundaries: tuple[np.ndarray, np.ndarray] | None = None
+        self._boundary_segments: tuple[np.ndarray, np.ndarray] | None = None
 
     @property
     def edges(self) -> list[TrackEdge]:
@@ -53,11 +108,15 @@ class Track:
     def track_nodes(self) -> list[TrackNode]:
         return self._track_nodes
 
+    @property
+    def track_width(self) -> int:
+        return self._track_width
+
     def _generate_nodes(self, width: int, height: int, checkpoints: int) -> None:
         self._nodes.clear()
         for _ in range(checkpoints):
-            x = random.randrange(self._offset_x, width - self._offset_x)
-            y = random.randrange(self._offset_y, height - self._offset_y)
+            x = self._random.randrange(self._offset_x, width - self._offset_x)
+            y = self._random.randrange(self._offset_y, height - self._offset_y)
             self._nodes.append(TrackNode(x, y))
 
     def _make_convex_hull(self, method: ConvexHullMethod) -> None:
@@ -96,32 +155,212 @@ class Track:
             edges.extend([TrackEdge(edge.src, mid_node), TrackEdge(mid_node, edge.dst)])
         self._edges = edges
 
+    def _index(self) -> None:
+        # Each node has one outgoing edge, so the loop is a walk through a
+        # src -> dst map from the first edge. Hulls of points tied for the
+        # bottom can join the chain back into its middle instead of its
+        # start, the walk then stops there and closes at the start
+        next_node = {edge.src: edge.dst for edge in self._edges}
+        nodes = [self._edges[0].src]
+        visited = set(nodes)
+        while nodes[-1] in next_node and next_node[nodes[-1]] not in visited:
+            nodes.append(next_node[nodes[-1]])
+            visited.add(nodes[-1])
+        nodes.append(nodes[0])
+        self._sorted_nodes = nodes
+
+        self._checkpoint_positions = _frozen(
+            np.array([node.as_tuple() for node in nodes[:-1]], dtype=np.float64)
+        )
+        self._checkpoint_gates = self._make_checkpoint_gates()
+
+        spline_points, centreline, checkpoint_rows = self._make_centreline()
+        self._spline_points = _frozen(spline_points)
+        self._centreline = _frozen(centreline)
+        segments = np.diff(self._centreline, axis=0)
+        lengths = np.linalg.norm(segments, axis=1)
+        self._arc_length = _frozen(np.concatenate(([0.0], np.cumsum(lengths))))
+        self._tangents = _frozen(segments / lengths[:, None])
+        self._normals = _frozen(
+            np.stack((-self._tangents[:, 1], self._tangents[:, 0]), axis=1)
+        )
+        self._checkpoint_arc_lengths = _frozen(self._arc_length[checkpoint_rows])
+        self._progress_index = None
+        self._boundaries = None
+        self._boundary_segments = None
+
     def edges_to_sorted_nodes(self) -> list[TrackNode]:
-        return self._edges_to_sorted_nodes(tuple(self._edges))
-
-    @cache
-    def _edges_to_sorted_nodes(self, edges: tuple[TrackEdge, ...]) -> list[TrackNode]:
-        start = edges[0].src
-        current = edges[0].dst
-        nodes = [start, current]
-        while len(nodes) < len(edges) + 1:
-            for edge in edges:
-                if edge.src == current:
-                    current = edge.dst
-                    nodes.append(current)
-        return nodes
+        """Nodes in driving order, the starting node repeated last."""
+        return list(self._sorted_nodes)
 
     def starting_node(self) -> TrackNode:
-        return self.edges_to_sorted_nodes()[0]
+        return self._sorted_nodes[0]
 
     def starting_angle_degree(self) -> float:
-        nodes = self.edges_to_sorted_nodes()
-        a = nodes[0]
-        b = nodes[1]
+        a = self._sorted_nodes[0]
+        b = self._sorted_nodes[1]
         return math.degrees(math.atan2(b.y - a.y, b.x - a.x)) + 90
 
-    @cache
+    def num_checkpoints(self) -> int:
+        return len(self._checkpoint_positions)
+
     def checkpoint(self, idx: int) -> Vec2:
-        nodes = self.edges_to_sorted_nodes()
-        idx %= len(nodes)
-        return Vec2(nodes[idx].x, nodes[idx].y)
+        idx %= self.num_checkpoints()
+        return Vec2.from_array(self._checkpoint_positions[idx])
+
+    def checkpoint_positions(self) -> np.ndarray:
+        return self._checkpoint_positions
+
+    def checkpoint_gates(self) -> tuple[np.ndarray, np.ndarray]:
+        """End points of the gate across the track at every checkpoint."""
+        return self._checkpoint_gates
+
+    def _make_checkpoint_gates(self) -> tuple[np.ndarray, np.ndarray]:
+        # Gates reach a quarter of the track width past each kerb, the same
+        # slack the old circle test had
+        loop = self._checkpoint_positions
+        tangents = np.roll(loop, -1, axis=0) - np.roll(loop, 1, axis=0)
+        tangents /= np.linalg.norm(tangents, axis=1, keepdims=True)
+        normals = np.stack((-tangents[:, 1], tangents[:, 0]), axis=1)
+
+        offset = normals * self._track_width * 0.75
+        return _frozen(loop - offset), _frozen(loop + offset)
+
+    def spline_control_points(self) -> list[tuple[int, int]]:
+        nodes = [node.as_tuple() for node in self._sorted_nodes]
+        return nodes[-2:] + nodes + nodes[:2]
+
+    def spline_points(self) -> np.ndarray:
+        """Every point rl.DrawSplineCatmullRom samples from the control points.
+
+        The start node is repeated in the control points, so the first and
+        last pieces start and end on it and draw a small loop around it.
+        """
+        return self._spline_points
+
+    def centreline(self) -> np.ndarray:
+        """Closed Catmull-Rom loop through the nodes, without the end loops."""
+        return self._centreline
+
+    def arc_length(self) -> np.ndarray:
+        """Distance along the centreline to each of its points."""
+        return self._arc_length
+
+    def length(self) -> float:
+        return float(self._arc_length[-1])
+
+    def tangents(self) -> np.ndarray:
+        """Unit direction of every centreline segment."""
+        return self._tangents
+
+    def normals(self) -> np.ndarray:
+        """Unit normal of every centreline segment, tangents turned by 90 degrees."""
+        return self._normals
+
+    def checkpoint_arc_lengths(self) -> np.ndarray:
+        """Distance along the centreline from the start to every checkpoint."""
+        return self._checkpoint_arc_lengths
+
+    def progress_index(self) -> ProgressIndex:
+        if self._progress_index is None:
+            self._progress_index = ProgressIndex(
+                self._centreline, self._arc_length, self._track_width
+            )
+        return self._progress_index
+
+    def _make_centreline(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Returns the spline as drawn, the centreline without its first and
+        # last pieces, and the rows of the checkpoints in the centreline,
+        # which it passes through at the start of every piece
+        points = np.array(self.spline_control_points(), dtype=np.float64)
+        t = np.linspace(0.0, 1.0, self.SPLINE_DIVISIONS + 1)
+        basis = 0.5 * np.stack(
+            (
+                -(t**3) + 2 * t**2 - t,
+                3 * t**3 - 5 * t**2 + 2,
+                -3 * t**3 + 4 * t**2 + t,
+                t**3 - t**2,
+            ),
+            axis=1,
+        )
+        controls = np.stack([points[i : len(points) - 3 + i] for i in range(4)], axis=1)
+        samples = np.einsum("tk,skd->std", basis, controls)
+        spline = np.concatenate((samples[:, :-1].reshape(-1, 2), samples[-1, -1:]))
+        line = np.concatenate((samples[1:-1, :-1].reshape(-1, 2), samples[-2, -1:]))
+
+        keep = np.ones(len(line), dtype=bool)
+        keep[1:] = np.any(np.diff(line, axis=0) != 0, axis=1)
+        rows = np.cumsum(keep) - 1
+        pieces = np.arange(len(self._sorted_nodes) - 1)
+        return spline, line[keep], rows[pieces * self.SPLINE_DIVISIONS]
+
+    def boundaries(self) -> tuple[np.ndarray, np.ndarray]:
+        """Inner and outer closed boundaries, track_width / 2 off the centreline."""
+        if self._boundaries is None:
+            self._boundaries = self._make_boundaries()
+        return self._boundaries
+
+    def _make_boundaries(self) -> tuple[np.ndarray, np.ndarray]:
+        loop = self._centreline[:-1]
+        tangents = np.roll(loop, -1, axis=0) - np.roll(loop, 1, axis=0)
+        tangents /= np.linalg.norm(tangents, axis=1, keepdims=True)
+        normals = np.stack((-tangents[:, 1], tangents[:, 0]), axis=1)
+
+        offset = normals * self._track_width / 2
+        lhs = np.concatenate((loop + offset, loop[:1] + offset[:1]))
+        rhs = np.concatenate((loop - offset, loop[:1] - offset[:1]))
+        if Track._area(lhs) < Track._area(rhs):
+            return lhs, rhs
+        return rhs, lhs
+
+    def boundary_segments(self) -> tuple[np.ndarray, np.ndarray]:
+        """Start and end points of the boundary segments on the track edge.
+
+        Offsetting a tight bend folds the inner boundary into loops and
+        crossing parts of the track cover each other's boundaries. Segments
+        are clipped to the parts at least track_width / 2 off the
+        centreline, to within BOUNDARY_CLIP_STEP.
+        """
+        if self._boundary_segments is None:
+            self._boundary_segments = self._make_boundary_segments()
+        return self._boundary_segments
+
+    def _make_boundary_segments(self) -> tuple[np.ndarray, np.ndarray]:
+        polylines = self.boundaries()
+        starts = np.concatenate([polyline[:-1] for polyline in polylines])
+        ends = np.concatenate([polyline[1:] for polyline in polylines])
+
+        # Every segment cut into pieces at most BOUNDARY_CLIP_STEP long,
+        # piece i of segment j runs from points[i + j] to points[i + j + 1]
+        lengths = np.linalg.norm(ends - starts, axis=1)
+        num_pieces = np.maximum(np.ceil(lengths / self.BOUNDARY_CLIP_STEP), 1)
+        num_pieces = num_pieces.astype(np.intp)
+        segments = np.repeat(np.arange(len(starts)), num_pieces + 1)
+        firsts = np.cumsum(num_pieces + 1) - (num_pieces + 1)
+        t = (np.arange(len(segments)) - firsts[segments]) / num_pieces[segments]
+        points = starts[segments] + t[:, None] * (ends - starts)[segments]
+
+        # The sampled boundary runs up to a pixel inside the road on bends
+        inside = self._track_width / 2 - 1
+        outside = self.progress_index().distance(points) >= inside
+        pieces = np.flatnonzero(segments[1:] == segments[:-1])
+        kept = outside[pieces] | outside[pieces + 1]
+
+        # Runs of kept pieces of one segment join back into one segment
+        continues = np.zeros(len(pieces) + 1, dtype=bool)
+        continues[1:-1] = (pieces[1:] == pieces[:-1] + 1) & kept[1:] & kept[:-1]
+        run_starts = pieces[kept & ~continues[:-1]]
+        run_ends = pieces[kept & ~continues[1:]] + 1
+        return points[run_starts], points[run_ends]
+
+    @classmethod
+    def _area(cls, polyline: np.ndarray) -> float:
+        xs = polyline[:, 0]
+        ys = polyline[:, 1]
+        return abs(float(np.dot(xs[:-1], ys[1:]) - np.dot(xs[1:], ys[:-1]))) / 2
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    # Shared with every caller, so nobody may change it in place
+    array.flags.writeable = False
+    return array
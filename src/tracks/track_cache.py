@@ -0,0 +1,131 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import BinaryIO, Callable
+import os
+import numpy as np
+
+from src.collision.distance_field import DistanceField
+from src.collision.track_mask import TrackMask
+from src.tracks.graph_structs import TrackNode
+from src.tracks.track import Track
+
+
+@dataclass(frozen=True)
+class TrackArtifact:
+    """Handle to a track saved on disk, cheap to pickle into worker processes.
+
+    The .npz holds the node loop, the track rebuilds everything else from
+    it as the generator did. The packed
+    occupancy mask and the distance field are raw .npy files opened with
+    mmap_mode="r", so every process reading them shares the same pages.
+    """
+
+    prefix: str
+
+    @property
+    def npz_path(self) -> str:
+        return self.prefix + ".npz"
+
+    @property
+    def mask_path(self) -> str:
+        return self.prefix + ".mask.npy"
+
+    @property
+    def field_path(self) -> str:
+        return self.prefix + ".field.npy"
+
+    def exists(self) -> bool:
+        paths = (self.npz_path, self.mask_path, self.field_path)
+        return all(map(os.path.exists, paths))
+
+    def save(
+        self, track: Track, track_mask: TrackMask, distance_field: DistanceField
+    ) -> None:
+        nodes = np.array([node.as_tuple() for node in track.edges_to_sorted_nodes()])
+        _save_atomic(
+            self.npz_path,
+            lambda file: np.savez(
+                file,
+                size=np.array([track_mask.width, track_mask.height]),
+                track_width=np.array(track.track_width),
+                max_distance=np.array(distance_field.max_distance),
+                nodes=nodes,
+            ),
+        )
+        _save_atomic(self.mask_path, lambda file: np.save(file, track_mask.bits))
+        _save_atomic(self.field_path, lambda file: np.save(file, distance_field.field))
+
+    def load(self) -> tuple[Track, TrackMask, DistanceField]:
+        with np.load(self.npz_path) as data:
+            width, height = data["size"].tolist()
+            track_width = int(data["track_width"])
+            max_distance = int(data["max_distance"])
+            nodes = [TrackNode(x, y) for x, y in data["nodes"].tolist()]
+
+        track = Track.from_nodes(width, height, nodes, track_width)
+        bits = np.load(self.mask_path, mmap_mode="r")
+        field = np.load(self.field_path, mmap_mode="r")
+        return (
+            track,
+            TrackMask.from_bits(bits, width),
+            DistanceField.from_field(field, max_distance),
+        )
+
+
+class TrackCache:
+    """Directory of generated tracks keyed by generator seed and parameters."""
+
+    # Bump when the artifact layout or the generator output changes
+    VERSION: int = 2
+
+    def __init__(self, directory: str) -> None:
+        self._directory: str = directory
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def artifact(
+        self,
+        seed: int,
+        width: int,
+        height: int,
+        checkpoints: int,
+        track_width: int,
+        max_distance: int = 32,
+    ) -> TrackArtifact:
+        key = (
+            f"track-v{self.VERSION}-s{seed}-{width}x{height}"
+            f"-c{checkpoints}-w{track_width}-d{max_distance}"
+        )
+        return TrackArtifact(os.path.join(self._directory, key))
+
+    def get(
+        self,
+        seed: int,
+        width: int,
+        height: int,
+        checkpoints: int,
+        track_width: int,
+        max_distance: int = 32,
+    ) -> TrackArtifact:
+        """Artifact of the track, generated and saved first when missing."""
+        artifact = self.artifact(
+            seed, width, height, checkpoints, track_width, max_distance
+        )
+        if not artifact.exists():
+            os.makedirs(self._directory, exist_ok=True)
+            track = Track(
+                width, height, checkpoints, track_width=track_width, seed=seed
+            )
+            track_mask = TrackMask.from_track(track, width, height)
+            artifact.save(track, track_mask, DistanceField(track_mask, max_distance))
+        return artifact
+
+
+def _save_atomic(path: str, write: Callable[[BinaryIO], None]) -> None:
+    # Readers in other processes never see a partially written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        write(file)
+    os.replace(tmp_path, path)
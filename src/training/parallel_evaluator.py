@@ -0,0 +1,148 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable
+import numpy as np
+
+from src.collision.distance_field import DistanceField
+from src.collision.track_mask import TrackMask
+from src.tracks.track import Track
+from src.tracks.track_cache import TrackArtifact
+from src.training.progress_monitor import GenerationStats
+from src.training.worker_pool import WorkerPool, worker_state
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Picklable handle to a read only array placed in shared memory."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    @classmethod
+    def create(
+        cls, array: np.ndarray
+    ) -> tuple[SharedArray, shared_memory.SharedMemory]:
+        memory = shared_memory.SharedMemory(create=True, size=array.nbytes)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[:] = array
+        return cls(memory.name, array.shape, array.dtype.str), memory
+
+    def attach(self) -> tuple[np.ndarray, shared_memory.SharedMemory]:
+        memory = shared_memory.SharedMemory(name=self.name)
+        array = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=memory.buf)
+        array.flags.writeable = False
+        return array, memory
+
+
+@dataclass(frozen=True)
+class SharedMaps:
+    """Track mask bits and distance field of one track in shared memory."""
+
+    bits: SharedArray
+    width: int
+    field: SharedArray
+    max_distance: int
+
+    @classmethod
+    def create(
+        cls, track_mask: TrackMask, distance_field: DistanceField
+    ) -> tuple[SharedMaps, list[shared_memory.SharedMemory]]:
+        bits, bits_memory = SharedArray.create(track_mask.bits)
+        field, field_memory = SharedArray.create(distance_field.field)
+        shared = cls(bits, track_mask.width, field, distance_field.max_distance)
+        return shared, [bits_memory, field_memory]
+
+    def attach(
+        self,
+    ) -> tuple[TrackMask, DistanceField, list[shared_memory.SharedMemory]]:
+        bits, bits_memory = self.bits.attach()
+        field, field_memory = self.field.attach()
+        return (
+            TrackMask.from_bits(bits, self.width),
+            DistanceField.from_field(field, self.max_distance),
+            [bits_memory, field_memory],
+        )
+
+
+def _build_simulation(
+    make_simulation: Callable[..., Any],
+    track: Track,
+    shared_maps: SharedMaps | None,
+    artifact: TrackArtifact | None,
+) -> tuple[Any, list[shared_memory.SharedMemory]]:
+    # The attached memory stays open as long as the simulation reads it
+    memory: list[shared_memory.SharedMemory] = []
+    if artifact is not None:
+        track, track_mask, distance_field = artifact.load()
+    else:
+        assert shared_maps is not None
+        track_mask, distance_field, memory = shared_maps.attach()
+    simulation = make_simulation(
+        track=track, track_mask=track_mask, distance_field=distance_field
+    )
+    return simulation, memory
+
+
+def _evaluate(
+    genomes: list, config: Any, generation: int
+) -> tuple[list[tuple[int, float]], GenerationStats]:
+    simulation, _ = worker_state()
+    stats = simulation.simulate(genomes, config, generation)
+    return [(key, genome.fitness) for key, genome in genomes], stats
+
+
+class ParallelEvaluator(WorkerPool):
+    """Evaluates a NEAT generation across a pool of worker processes.
+
+    Each worker builds its own simulation once from
+    make_simulation(track=..., track_mask=..., distance_field=...), reading
+    the track mask and its distance field from shared memory instead of
+    building them again. Given a saved track artifact, workers memory map
+    its maps instead. A generation is split into
+    one share of genomes per worker; every share runs as a single batch of
+    cars and the fitness values are merged back into the genomes.
+    """
+
+    def __init__(
+        self,
+        make_simulation: Callable[..., Any],
+        track: Track,
+        track_mask: TrackMask,
+        num_workers: int | None = None,
+        artifact: TrackArtifact | None = None,
+        distance_field: DistanceField | None = None,
+    ) -> None:
+        self._generation: int = 0
+        shared_maps: SharedMaps | None = None
+        self._memory: list[shared_memory.SharedMemory] = []
+        if artifact is None:
+            shared_maps, self._memory = SharedMaps.create(
+                track_mask,
+                DistanceField(track_mask) if distance_field is None else distance_field,
+            )
+        super().__init__(
+            _build_simulation,
+            (make_simulation, track, shared_maps, artifact),
+            num_workers,
+        )
+
+    def close(self) -> None:
+        super().close()
+        for memory in self._memory:
+            memory.close()
+            memory.unlink()
+
+    def eval_genomes(self, genomes, config) -> GenerationStats:
+        self._generation += 1
+        shares = [genomes[i :: self._num_workers] for i in range(self._num_workers)]
+        jobs = [(share, config, self._generation) for share in shares if share]
+
+        results = self.starmap(_evaluate, jobs)
+
+        fitness = dict(pair for pairs, _ in results for pair in pairs)
+        for key, genome in genomes:
+            genome.fitness = fitness[key]
+
+        # Shares run side by side, the generation lasts as long as the longest
+        return GenerationStats.merge(self._generation, [stats for _, stats in results])
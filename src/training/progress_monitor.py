@@ -0,0 +1,101 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from itertools import zip_longest
+import numpy as np
+
+from src.contexts.context import Context
+from src.controllers.network_cache import NetworkCacheStats
+from src.vehicle.car_batch import CarBatch
+
+
+@dataclass(frozen=True)
+class GenerationStats:
+    generation: int
+    ticks: int
+    max_ticks: int
+    networks: NetworkCacheStats = NetworkCacheStats()
+    tracks: int = 1
+    # Wall time of the ticks, without building the networks
+    simulate_sec: float = 0.0
+    # Cars still driving at the start and every sample_ticks ticks, then at
+    # the end
+    alive: tuple[int, ...] = ()
+    sample_ticks: int = 0
+    # Number of cars that passed 0, 1, 2, ... checkpoint gates
+    checkpoints: tuple[int, ...] = ()
+
+    @property
+    def ticks_saved(self) -> int:
+        return self.max_ticks - self.ticks
+
+    @classmethod
+    def merge(
+        cls, generation: int, all_stats: list[GenerationStats], tracks: int = 1
+    ) -> GenerationStats:
+        """Stats of shares of one generation that ran side by side."""
+        return cls(
+            generation,
+            max(stats.ticks for stats in all_stats),
+            max(stats.max_ticks for stats in all_stats),
+            sum((stats.networks for stats in all_stats), NetworkCacheStats()),
+            tracks,
+            max(stats.simulate_sec for stats in all_stats),
+            tuple(map(sum, zip_longest(*(s.alive for s in all_stats), fillvalue=0))),
+            all_stats[0].sample_ticks,
+            tuple(
+                map(sum, zip_longest(*(s.checkpoints for s in all_stats), fillvalue=0))
+            ),
+        )
+
+
+class ProgressMonitor:
+    """Deactivates cars that made no progress for stall_ticks ticks.
+
+    A car progresses by matching a new checkpoint or by getting further than
+    min_distance from where it last progressed, so cars standing still,
+    spinning or circling in place stop early. stall_ticks of 0 turns it off.
+    """
+
+    def __init__(self, stall_ticks: int, min_distance: float) -> None:
+        self._stall_ticks: int = stall_ticks
+        self._min_distance: float = min_distance
+        self._tick: int = 0
+        self._progress_tick: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._progress_pos: np.ndarray = np.zeros((0, 2))
+        self._progress_checkpoints: np.ndarray = np.zeros(0, dtype=np.int64)
+
+    @property
+    def enabled(self) -> bool:
+        return self._stall_ticks > 0
+
+    def reset(self, batch: CarBatch) -> None:
+        """Starts watching every car currently in the batch."""
+        size = len(batch)
+        self._tick = 0
+        self._progress_tick = np.zeros(size, dtype=np.int64)
+        self._progress_pos = batch.pos[:size].copy()
+        self._progress_checkpoints = batch.checkpoints[:size].copy()
+
+    def update(self, ctx: Context) -> None:
+        if not self.enabled:
+            return
+        self._tick += 1
+        players = [player for player in ctx.players if player._car.active]
+        if not players:
+            return
+
+        batch = ctx.car_batch
+        rows = np.array([player._car.row for player in players])
+        moved = np.linalg.norm(batch.pos[rows] - self._progress_pos[rows], axis=1)
+        checkpoints = batch.checkpoints[rows]
+        progressed = (moved > self._min_distance) | (
+            checkpoints > self._progress_checkpoints[rows]
+        )
+        progressed_rows = rows[progressed]
+        self._progress_tick[progressed_rows] = self._tick
+        self._progress_pos[progressed_rows] = batch.pos[progressed_rows]
+        self._progress_checkpoints[progressed_rows] = checkpoints[progressed]
+
+        stalled = self._tick - self._progress_tick[rows] >= self._stall_ticks
+        for i in np.flatnonzero(stalled):
+            players[i].deactivate()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+from typing import Any
+import json
+import threading
+
+from src.training.progress_monitor import GenerationStats
+
+
+def generation_record(
+    stats: GenerationStats,
+    genomes: list,
+    evaluate_sec: float,
+    reproduction_sec: float | None,
+) -> dict[str, Any]:
+    """One telemetry record of an evaluated generation.
+
+    evaluate_sec is the wall time of the whole evaluation and
+    reproduction_sec the time NEAT took to breed the generation, None for
+    the first one. With several processes compile_sec adds up the time
+    spent in all of them and simulate_sec is that of the longest share.
+    """
+    fitness = [genome.fitness for _, genome in genomes]
+    wall_sec = evaluate_sec + (reproduction_sec or 0.0)
+    return {
+        "generation": stats.generation,
+        "wall_sec": wall_sec,
+        "ticks": stats.ticks,
+        "max_ticks": stats.max_ticks,
+        "ticks_per_sec": stats.ticks / evaluate_sec if evaluate_sec > 0 else 0.0,
+        "tracks": stats.tracks,
+        "genomes": len(genomes),
+        "best_fitness": max(fitness, default=0.0),
+        "mean_fitness": sum(fitness) / len(fitness) if fitness else 0.0,
+        "alive": list(stats.alive),
+        "alive_sample_ticks": stats.sample_ticks,
+        "checkpoints": list(stats.checkpoints),
+        "compile_sec": stats.networks.compile_sec,
+        "simulate_sec": stats.simulate_sec,
+        "evaluate_sec": evaluate_sec,
+        "reproduction_sec": reproduction_sec,
+        "networks_cached": stats.networks.hits,
+        "networks_compiled": stats.networks.misses,
+    }
+
+
+class TelemetrySink:
+    """Appends records as JSON lines to a file from a background thread.
+
+    write only queues the record in memory, so training never waits on the
+    disk. The thread writes out the queued records every flush_sec seconds
+    and close writes out the rest.
+    """
+
+    def __init__(self, path: str, flush_sec: float = 1.0) -> None:
+        self._path: str = path
+        self._flush_sec: float = flush_sec
+        self._records: list[dict[str, Any]] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._closed: threading.Event = threading.Event()
+        self._thread: threading.Thread = threading.Thread(
+            target=self._run, name="telemetry", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> TelemetrySink:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def write(self, record: dict[str, Any]) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._closed.wait(self._flush_sec):
+            self._flush()
+        self._flush()
+
+    def _flush(self) -> None:
+        with self._lock:
+            records, self._records = self._records, []
+        if not records:
+            return
+        with open(self._path, "a") as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
@@ -0,0 +1,117 @@
+from __future__ import annotations
+from multiprocessing import Pool
+from typing import Any, Callable
+import numpy as np
+
+from src.tracks.track_cache import TrackArtifact, TrackCache
+from src.training.progress_monitor import GenerationStats
+from src.training.worker_pool import WorkerPool, num_workers_or_cpus, worker_state
+
+
+class TrackPool:
+    """Several saved tracks, generated and rasterized in parallel processes."""
+
+    def __init__(self, artifacts: list[TrackArtifact]) -> None:
+        assert artifacts
+        self._artifacts: list[TrackArtifact] = artifacts
+
+    @property
+    def artifacts(self) -> list[TrackArtifact]:
+        return self._artifacts
+
+    def __len__(self) -> int:
+        return len(self._artifacts)
+
+    @classmethod
+    def build(
+        cls,
+        cache: TrackCache,
+        seeds: list[int],
+        width: int,
+        height: int,
+        checkpoints: int,
+        track_width: int,
+        num_workers: int | None = None,
+    ) -> TrackPool:
+        """Pool of the tracks of seeds, generating missing ones side by side."""
+        jobs = [(seed, width, height, checkpoints, track_width) for seed in seeds]
+        with Pool(min(num_workers_or_cpus(num_workers), len(jobs))) as pool:
+            return cls(pool.starmap(cache.get, jobs))
+
+
+def _build_simulations(
+    make_simulation: Callable[..., Any], artifacts: list[TrackArtifact]
+) -> list[Any]:
+    simulations = []
+    for artifact in artifacts:
+        track, track_mask, distance_field = artifact.load()
+        simulations.append(
+            make_simulation(
+                track=track, track_mask=track_mask, distance_field=distance_field
+            )
+        )
+    # A genome scored on several tracks in one worker compiles once
+    for simulation in simulations[1:]:
+        simulation.network_cache = simulations[0].network_cache
+    return simulations
+
+
+def _evaluate(
+    track_id: int, genomes: list, config: Any, generation: int
+) -> tuple[int, list[tuple[int, float]], GenerationStats]:
+    stats = worker_state()[track_id].simulate(genomes, config, generation)
+    return track_id, [(key, genome.fitness) for key, genome in genomes], stats
+
+
+class TrackPoolEvaluator(WorkerPool):
+    """Evaluates every genome of a NEAT generation on all tracks of a pool.
+
+    Each worker process loads every track once, memory mapping the saved
+    maps, and builds one simulation per track. A generation becomes one job
+    per track and share of genomes, all running side by side, so with at
+    least as many workers as tracks it takes about as long as one track.
+    The per track fitness values of a genome combine into its fitness by
+    their mean or their minimum.
+    """
+
+    COMBINE: dict[str, Callable[..., np.ndarray]] = {"mean": np.mean, "min": np.min}
+
+    def __init__(
+        self,
+        make_simulation: Callable[..., Any],
+        track_pool: TrackPool,
+        num_workers: int | None = None,
+        combine: str = "mean",
+    ) -> None:
+        self._num_tracks: int = len(track_pool)
+        self._combine: Callable[..., np.ndarray] = TrackPoolEvaluator.COMBINE[combine]
+        self._generation: int = 0
+        super().__init__(
+            _build_simulations, (make_simulation, track_pool.artifacts), num_workers
+        )
+
+    def eval_genomes(self, genomes, config) -> GenerationStats:
+        self._generation += 1
+        # Enough shares per track to give every worker a job
+        num_shares = -(-self._num_workers // self._num_tracks)
+        shares = [genomes[i::num_shares] for i in range(num_shares)]
+        jobs = [
+            (track_id, share, config, self._generation)
+            for track_id in range(self._num_tracks)
+            for share in shares
+            if share
+        ]
+
+        results = self.starmap(_evaluate, jobs)
+
+        column = {key: i for i, (key, _) in enumerate(genomes)}
+        fitness = np.zeros((self._num_tracks, len(genomes)))
+        for track_id, pairs, _ in results:
+            for key, value in pairs:
+                fitness[track_id, column[key]] = value
+        for (_, genome), value in zip(genomes, self._combine(fitness, axis=0)):
+            genome.fitness = float(value)
+
+        return GenerationStats.merge(
+            self._generation, [stats for _, _, stats in results], self._num_tracks
+        )
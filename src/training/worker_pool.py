@@ -0,0 +1,57 @@
+from __future__ import annotations
+from multiprocessing import Pool
+from typing import Any, Callable, Self
+import os
+
+# Per worker process state, built once by _init_worker
+_state: Any = None
+
+
+def _init_worker(build_state: Callable[..., Any], args: tuple) -> None:
+    global _state
+    _state = build_state(*args)
+
+
+def num_workers_or_cpus(num_workers: int | None) -> int:
+    return (os.cpu_count() or 1) if num_workers is None else num_workers
+
+
+def worker_state() -> Any:
+    """State built by build_state in the worker process calling this."""
+    return _state
+
+
+class WorkerPool:
+    """Process pool whose workers build their state once when they start.
+
+    Jobs run in a worker read what build_state(*args) returned there through
+    worker_state(). One worker per CPU unless num_workers is given.
+    """
+
+    def __init__(
+        self,
+        build_state: Callable[..., Any],
+        args: tuple,
+        num_workers: int | None = None,
+    ) -> None:
+        self._num_workers: int = num_workers_or_cpus(num_workers)
+        self._pool = Pool(
+            self._num_workers, initializer=_init_worker, initargs=(build_state, args)
+        )
+
+    @property
+    def num_workers(self) -> int:
+        return self._num_workers
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.close()
+        self._pool.join()
+
+    def starmap(self, function: Callable[..., Any], jobs: list[tuple]) -> list:
+        return self._pool.starmap(function, jobs)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+import numpy as np
+
+from .constants import SCALE
+
+
+class CarBatch:
+    """State of many cars in contiguous arrays, one row per car.
+
+    The bicycle model of every active car advances in a handful of NumPy
+    operations per tick. Car is a thin view over a single row.
+    """
+
+    WIDTH: int = 12 * SCALE
+    HEIGHT: int = 25 * SCALE
+    OFFSET_Y: int = HEIGHT // 5
+
+    MAX_SPEED_FORWARD: float = 4 * SCALE
+    MAX_SPEED_BACKWARD: float = 2 * SCALE
+
+    # CENTRE OF rotation_degree
+    MAX_COR_Y = 10 * SCALE
+    COR_DIST_X: float = 25 * SCALE
+
+    DISTANCE_FRONT_BACK_WHEELS: int = HEIGHT - 2 * OFFSET_Y
+    EPS = 10e-1
+    MIN_STEER_TILT = 1
+
+    WHEEL_WIDTH: int = 4 * SCALE
+    WHEEL_HEIGHT: int = 8 * SCALE
+
+    # Left front, right front, left back, right back, relative to the centre
+    WHEELS_LOCAL: np.ndarray = np.array(
+        [
+            [-WIDTH / 2, -HEIGHT / 2 + OFFSET_Y],
+            [WIDTH / 2, -HEIGHT / 2 + OFFSET_Y],
+            [-WIDTH / 2, HEIGHT / 2 - OFFSET_Y],
+            [WIDTH / 2, HEIGHT / 2 - OFFSET_Y],
+        ]
+    )
+
+    def __init__(self, capacity: int = 16) -> None:
+        self._size: int = 0
+        self._allocate(capacity, 0)
+
+    def _allocate(self, capacity: int, max_rays: int) -> None:
+        def grown(name: str, shape: tuple[int, ...], dtype) -> np.ndarray:
+            array = np.zeros(shape, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[tuple(slice(0, size) for size in old.shape)] = old
+            return array
+
+        self.pos = grown("pos", (capacity, 2), np.float64)
+        self.prev_pos = grown("prev_pos", (capacity, 2), np.float64)
+        self.rotation_degree = grown("rotation_degree", (capacity,), np.float64)
+        self.velocity = grown("velocity", (capacity,), np.float64)
+        self.cor_y = grown("cor_y", (capacity,), np.float64)
+        self.steering_angle = grown("steering_angle", (capacity,), np.float64)
+        self.dirty = grown("dirty", (capacity,), bool)
+        self.active = grown("active", (capacity,), bool)
+        self.checkpoints = grown("checkpoints", (capacity,), np.int64)
+        self.next_checkpoint = grown("next_checkpoint", (capacity, 2), np.float64)
+        self.num_rays = grown("num_rays", (capacity,), np.int64)
+        self.ray_lengths = grown("ray_lengths", (capacity, max_rays), np.float64)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, x: float, y: float, rotation_degree: float, num_rays: int) -> int:
+        capacity = len(self.pos)
+        max_rays = self.ray_lengths.shape[1]
+        if self._size == capacity or num_rays > max_rays:
+            if self._size == capacity:
+                capacity = max(2 * capacity, 1)
+            self._allocate(capacity, max(num_rays, max_rays))
+
+        row = self._size
+        self._size += 1
+        self.pos[row] = (x, y)
+        self.prev_pos[row] = (x, y)
+        self.rotation_degree[row] = rotation_degree
+        self.velocity[row] = 0.0
+        self.cor_y[row] = 0.0
+        self.steering_angle[row] = 0.0
+        self.active[row] = True
+        self.checkpoints[row] = 1
+        self.next_checkpoint[row] = np.nan
+        self.num_rays[row] = num_rays
+        self.ray_lengths[row] = 0.0
+
+        self.update(np.array([row]))
+        return row
+
+    def clear(self) -> None:
+        self._size = 0
+
+    def active_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.active[: self._size])
+
+    def any_active(self) -> bool:
+        return bool(self.active[: self._size].any())
+
+    def num_active(self) -> int:
+        return int(self.active[: self._size].sum())
+
+    def update(self, rows: np.ndarray | None = None) -> None:
+        if rows is None:
+            rows = self.active_rows()
+        self.move(rows)
+        self.steering_angle[rows] = self.front_wheels_tilt(self.cor_y[rows]).mean(
+            axis=1
+        )
+        self.dirty[rows] = True
+
+    def move(self, rows: np.ndarray) -> None:
+        angle_rad = np.radians(self.rotation_degree[rows])
+        velocity = self.velocity[rows]
+        self.prev_pos[rows] = self.pos[rows]
+        self.pos[rows, 0] += np.sin(angle_rad) * velocity
+        self.pos[rows, 1] -= np.cos(angle_rad) * velocity
+
+        turning = np.abs(self.cor_y[rows]) >= self.MIN_STEER_TILT
+        delta_rad = np.radians(self.steering_angle[rows])
+        self.rotation_degree[rows] += np.where(
+            turning,
+            np.degrees(velocity / self.DISTANCE_FRONT_BACK_WHEELS * np.tan(delta_rad)),
+            0.0,
+        )
+
+    @classmethod
+    def wheels(cls, pos: np.ndarray, rotation_degree: float) -> np.ndarray:
+        """Centres of the four wheels of a car, shaped (4, 2)."""
+        angle_rad = np.radians(rotation_degree)
+        sin = np.sin(angle_rad)
+        cos = np.cos(angle_rad)
+        lx = cls.WHEELS_LOCAL[:, 0]
+        ly = cls.WHEELS_LOCAL[:, 1]
+        return np.stack(
+            (cos * lx - sin * ly + pos[0], sin * lx + cos * ly + pos[1]), axis=1
+        )
+
+    @classmethod
+    def front_wheels_tilt(cls, cor_y: np.ndarray) -> np.ndarray:
+        """Tilt of the left and right front wheels, shaped (len(cor_y), 2).
+
+        Angles between the front wheels and the centre of rotation do not
+        depend on the heading, so they are taken in the car's own frame.
+        """
+        cor_y = np.asarray(cor_y, dtype=np.float64)[:, None]
+        cor_x = np.where(cor_y < 0, -cls.COR_DIST_X, cls.COR_DIST_X)
+        cor_y_local = np.abs(cor_y) - cls.HEIGHT / 2 + cls.OFFSET_Y
+        dx = cls.WHEELS_LOCAL[:2, 0] - cor_x
+        dy = cls.WHEELS_LOCAL[:2, 1] - cor_y_local
+
+        angle = np.where(
+            cor_y > 0,
+            np.arctan2(dy, dx) - np.pi,
+            np.arctan2(-dy, -dx) + np.pi,
+        )
+        tilt = (np.degrees(angle) + 180) % 360 - 180
+        steering = np.abs(cor_y) >= cls.MIN_STEER_TILT
+        return np.where(steering, tilt, 0.0)
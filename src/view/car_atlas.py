@@ -0,0 +1,78 @@
+import numpy as np
+import raylib as rl
+
+from src.vehicle.car import Car
+from src.vehicle.car_batch import CarBatch
+
+
+class CarAtlas:
+    """Car sprites, body and wheels, baked once per steering position.
+
+    The body is baked white, so the tint of DrawTexturePro colours it while
+    the black wheels stay black, and a whole car takes a single call.
+    """
+
+    PAD: int = CarBatch.WHEEL_HEIGHT
+    SPRITE_WIDTH: int = CarBatch.WIDTH + 2 * PAD
+    SPRITE_HEIGHT: int = CarBatch.HEIGHT + 2 * PAD
+
+    def __init__(self, num_frames: int = 21) -> None:
+        self._cor_ys: np.ndarray = np.linspace(
+            -CarBatch.MAX_COR_Y, CarBatch.MAX_COR_Y, num_frames
+        )
+        self._texture: rl.RenderTexture
+
+    @property
+    def num_frames(self) -> int:
+        return len(self._cor_ys)
+
+    def bake(self) -> None:
+        w = CarBatch.WIDTH
+        h = CarBatch.HEIGHT
+        ww = CarBatch.WHEEL_WIDTH
+        wh = CarBatch.WHEEL_HEIGHT
+
+        self._texture = rl.LoadRenderTexture(
+            self.SPRITE_WIDTH * self.num_frames, self.SPRITE_HEIGHT
+        )
+        rl.BeginTextureMode(self._texture)
+        rl.ClearBackground(rl.BLANK)
+        tilts = CarBatch.front_wheels_tilt(self._cor_ys).tolist()
+        for frame, (left, right) in enumerate(tilts):
+            cx = frame * self.SPRITE_WIDTH + self.SPRITE_WIDTH / 2
+            cy = self.SPRITE_HEIGHT / 2
+            wheels = CarBatch.WHEELS_LOCAL.tolist()
+            for (lx, ly), tilt in zip(wheels, (left, right, 0.0, 0.0)):
+                rl.DrawRectanglePro(
+                    (cx + lx, cy + ly, ww, wh), [ww / 2, wh / 2], tilt, rl.BLACK
+                )
+            rl.DrawRectanglePro((cx, cy, w, h), [w / 2, h / 2], 0.0, rl.WHITE)
+        rl.EndTextureMode()
+
+    def draw(self, batch: CarBatch, cars: list[Car]) -> None:
+        if not cars:
+            return
+        rows = np.array([car.row for car in cars])
+        step = self._cor_ys[1] - self._cor_ys[0]
+        frames = np.rint((batch.cor_y[rows] - self._cor_ys[0]) / step).astype(int)
+        frames = np.clip(frames, 0, self.num_frames - 1)
+
+        texture = self._texture.texture
+        sw = self.SPRITE_WIDTH
+        sh = self.SPRITE_HEIGHT
+        origin = (sw / 2, sh / 2)
+        for car, (x, y), rotation, frame in zip(
+            cars,
+            batch.pos[rows].tolist(),
+            batch.rotation_degree[rows].tolist(),
+            frames.tolist(),
+        ):
+            # Render textures are stored upside down, a negative height flips back
+            rl.DrawTexturePro(
+                texture,
+                (frame * sw, 0, sw, -sh),
+                (x, y, sw, sh),
+                origin,
+                rotation,
+                car.color,
+            )
@@ -1,7 +1,9 @@
+import numpy as np
 import raylib as rl
-from src.rays.ray import Ray
 from src.contexts.context import Context
+from src.profiling.tick_profiler import TickProfiler
 from src.vehicle.car import Car
+from src.view.car_atlas import CarAtlas
 
 
 class Renderer:
@@ -9,13 +11,15 @@ class Renderer:
         self._width = width
         self._height = height
         self._track_texture: rl.RenderTexture
+        self._car_atlas: CarAtlas = CarAtlas()
 
     def bake_track(self, ctx: Context) -> None:
-        nodes = ctx.track.edges_to_sorted_nodes()
-        nodes_as_tuple = list(
-            map(lambda node: (node.x, ctx.constants.HEIGHT - node.y), nodes)
+        closed = list(
+            map(
+                lambda point: (point[0], ctx.constants.HEIGHT - point[1]),
+                ctx.track.spline_control_points(),
+            )
         )
-        closed = nodes_as_tuple[-2:] + nodes_as_tuple + nodes_as_tuple[:2]
 
         self._track_texture = rl.LoadRenderTexture(self._width, self._height)
         rl.BeginTextureMode(self._track_texture)
@@ -25,17 +29,28 @@ class Renderer:
         )
         rl.EndTextureMode()
 
+    def bake_cars(self) -> None:
+        self._car_atlas.bake()
+
     def begin(self) -> None:
         rl.BeginDrawing()
 
-    def draw(self, ctx: Context) -> None:
+    def draw(self, ctx: Context, cars: list[Car] | None = None) -> None:
+        """Draws the track and the given cars, every active car by default."""
         self._draw_track(ctx)
-        for car in ctx.cars:
-            self._draw_car(car)
-            if ctx.constants.DRAW_RAYS:
-                self._draw_rays(car.rays)
+        if cars is None:
+            cars = [car for car in ctx.cars if car.active]
+        if ctx.debug.CAR_SHAPES:
+            for car in cars:
+                self._draw_car(car)
+        else:
+            self._car_atlas.draw(ctx.car_batch, cars)
 
-            if ctx.debug.TRACK_NODES:
+        if ctx.constants.DRAW_RAYS:
+            self._draw_rays(ctx, cars)
+
+        if ctx.debug.TRACK_NODES:
+            for car in cars:
                 self._draw_next_checkpoint(ctx, car)
 
         rl.DrawFPS(4, 4)
@@ -43,9 +58,27 @@ class Renderer:
     def end(self) -> None:
         rl.EndDrawing()
 
-    def draw_stats(self, ctx: Context, cur_gen: int, max_gen: int) -> None:
+    def clear(self, ctx: Context) -> None:
+        rl.ClearBackground(ctx.constants.BG_COLOR)
+
+    def draw_stats(
+        self, ctx: Context, cur_gen: int, max_gen: int, view: str = ""
+    ) -> None:
         stat_str: bytes = f"{cur_gen:4} / {max_gen:4}".encode()
         rl.DrawText(stat_str, 0, ctx.constants.HEIGHT - 50, 32, rl.WHITE)
+        if view:
+            rl.DrawText(view.encode(), 0, ctx.constants.HEIGHT - 80, 20, rl.WHITE)
+
+    def draw_profile(self, ctx: Context, profiler: TickProfiler) -> None:
+        """Mean milliseconds per tick of every phase, above the stats."""
+        mean_ms = profiler.mean_ms().tolist()
+        lines = [
+            f"{name:>11} {ms:6.3f} ms" for name, ms in zip(profiler.PHASES, mean_ms)
+        ]
+        lines.append(f"{'tick':>11} {sum(mean_ms):6.3f} ms")
+        for i, line in enumerate(reversed(lines)):
+            y = ctx.constants.HEIGHT - 110 - 20 * i
+            rl.DrawText(line.encode(), 0, y, 20, rl.WHITE)
 
     def _draw_car(self, car: Car) -> None:
         x, y, w, h = car.rect
@@ -68,15 +101,58 @@ class Renderer:
             for edge in ctx.track.edges:
                 rl.DrawLineEx(edge.src.as_tuple(), edge.dst.as_tuple(), 8, rl.BLACK)
 
-    def _draw_rays(self, rays: list[Ray]) -> None:
-        for ray in rays:
-            if ray.hit:
-                rl.DrawLineEx(
-                    [int(ray.origin.x), int(ray.origin.y)],
-                    [int(ray.hit.x), int(ray.hit.y)],
-                    2.0,
-                    rl.RED,
-                )
+    def _draw_rays(self, ctx: Context, cars: list[Car]) -> None:
+        batch = ctx.car_batch
+        rows = np.array([car.row for car in cars if car.num_rays], dtype=np.intp)
+        if not rows.size:
+            return
+
+        starts, ends = [], []
+        num_rays = batch.num_rays[rows]
+        for n in np.unique(num_rays).tolist():
+            group = rows[num_rays == n]
+            relative = Car.relative_ray_angles(n)
+            angles = np.radians(batch.rotation_degree[group, None] + relative)
+            directions = np.stack((np.cos(angles), np.sin(angles)), axis=2)
+            lengths = batch.ray_lengths[group, :n]
+            origins = np.broadcast_to(batch.pos[group, None, :], directions.shape)
+            starts.append(origins.reshape(-1, 2))
+            ends.append((origins + directions * lengths[:, :, None]).reshape(-1, 2))
+
+        # Every ray of every car in one triangle strip submission
+        strip = Renderer.lines_strip(np.concatenate(starts), np.concatenate(ends), 2.0)
+        points = rl.ffi.from_buffer("Vector2[]", strip.data)
+        rl.DrawTriangleStrip(points, len(strip), rl.RED)
+
+    @classmethod
+    def lines_strip(
+        cls, starts: np.ndarray, ends: np.ndarray, thick: float
+    ) -> np.ndarray:
+        """Triangle strip drawing every segment the way DrawLineEx does.
+
+        Each segment is the quad DrawLineEx builds. Repeating the last vertex
+        of one quad and the first of the next joins them with triangles of
+        zero area, which draw nothing, and keeps every quad's winding.
+        """
+        delta = ends - starts
+        lengths = np.linalg.norm(delta, axis=1, keepdims=True)
+        keep = lengths[:, 0] > 0
+        starts, ends, delta, lengths = (
+            starts[keep],
+            ends[keep],
+            delta[keep],
+            lengths[keep],
+        )
+        if not len(starts):
+            return np.zeros((0, 2), dtype=np.float32)
+
+        radius = thick / (2 * lengths) * np.stack((-delta[:, 1], delta[:, 0]), axis=1)
+        quads = np.stack(
+            (starts - radius, starts + radius, ends - radius, ends + radius), axis=1
+        )
+        previous_last = np.concatenate((quads[:1, 0], quads[:-1, 3]))
+        blocks = np.concatenate((previous_last[:, None], quads[:, :1], quads), axis=1)
+        return np.ascontiguousarray(blocks.reshape(-1, 2), dtype=np.float32)
 
     def _draw_next_checkpoint(self, ctx: Context, car: Car) -> None:
         idx = car.checkpoints_matched
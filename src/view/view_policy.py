@@ -0,0 +1,86 @@
+from enum import Enum
+import raylib as rl
+
+from src.contexts.context import Context
+from src.vehicle.car import Car
+
+
+class ViewMode(Enum):
+    ALL = "all cars"
+    EVERY_NTH = "every nth frame"
+    TOP_K = "top k cars"
+    STATS = "stats only"
+
+
+class ViewPolicy:
+    """What the training window shows, switched from the keyboard.
+
+    1 draws every car every frame, 2 the whole scene every nth frame, 3 only
+    the k best cars by current score and 4 only the stats, every nth frame.
+    Up and down double or halve n or k. Frames that draw nothing only poll
+    input, so the simulation runs on at full speed.
+    """
+
+    KEYS: dict[int, ViewMode] = {
+        rl.KEY_ONE: ViewMode.ALL,
+        rl.KEY_TWO: ViewMode.EVERY_NTH,
+        rl.KEY_THREE: ViewMode.TOP_K,
+        rl.KEY_FOUR: ViewMode.STATS,
+    }
+
+    def __init__(
+        self, mode: ViewMode = ViewMode.ALL, every_nth: int = 10, top_k: int = 5
+    ) -> None:
+        self._mode: ViewMode = mode
+        self._every_nth: int = every_nth
+        self._top_k: int = top_k
+        self._frame: int = 0
+
+    @property
+    def mode(self) -> ViewMode:
+        return self._mode
+
+    def __str__(self) -> str:
+        if self._mode in (ViewMode.EVERY_NTH, ViewMode.STATS):
+            return f"{self._mode.value}, n = {self._every_nth}"
+        if self._mode == ViewMode.TOP_K:
+            return f"{self._mode.value}, k = {self._top_k}"
+        return self._mode.value
+
+    def handle_keys(self) -> None:
+        for key, mode in ViewPolicy.KEYS.items():
+            if rl.IsKeyPressed(key):
+                self._mode = mode
+
+        scale = 0
+        if rl.IsKeyPressed(rl.KEY_UP):
+            scale = 1
+        elif rl.IsKeyPressed(rl.KEY_DOWN):
+            scale = -1
+        if self._mode == ViewMode.TOP_K:
+            self._top_k = self._scaled(self._top_k, scale)
+        elif self._mode != ViewMode.ALL:
+            self._every_nth = self._scaled(self._every_nth, scale)
+
+    def next_frame(self) -> tuple[bool, bool]:
+        """Whether this frame draws the scene and whether it draws the stats."""
+        self._frame += 1
+        if self._mode in (ViewMode.ALL, ViewMode.TOP_K):
+            return True, True
+        shown = self._frame % self._every_nth == 0
+        return shown and self._mode == ViewMode.EVERY_NTH, shown
+
+    def cars(self, ctx: Context) -> list[Car]:
+        active = [player for player in ctx.players if player._car.active]
+        if self._mode == ViewMode.TOP_K:
+            active.sort(key=lambda player: player.score, reverse=True)
+            active = active[: self._top_k]
+        return [player._car for player in active]
+
+    @classmethod
+    def _scaled(cls, value: int, scale: int) -> int:
+        if scale > 0:
+            return value * 2
+        if scale < 0:
+            return max(value // 2, 1)
+        return value
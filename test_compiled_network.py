@@ -0,0 +1,56 @@
+import random
+from pathlib import Path
+
+import neat
+import numpy as np
+
+from src.controllers.compiled_network import CompiledNetwork, NetworkBatch
+
+CONFIG_PATH = Path(__file__).parent / "cfg" / "neat-config.txt"
+
+
+def mutated_genomes(num_genomes: int, seed: int) -> tuple[list, neat.Config]:
+    config = neat.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        str(CONFIG_PATH),
+    )
+    random.seed(seed)
+    genomes = []
+    for key in range(num_genomes):
+        genome = config.genome_type(key)
+        genome.configure_new(config.genome_config)
+        for _ in range(random.randrange(40)):
+            genome.mutate(config.genome_config)
+        genomes.append(genome)
+    return genomes, config
+
+
+def test_network_batch_matches_activate() -> None:
+    genomes, config = mutated_genomes(200, seed=3)
+    num_outputs = config.genome_config.num_outputs
+    assert any(len(genome.nodes) > num_outputs for genome in genomes)
+    assert any(
+        not connection.enabled
+        for genome in genomes
+        for connection in genome.connections.values()
+    )
+
+    nets = [neat.nn.FeedForwardNetwork.create(genome, config) for genome in genomes]
+    compiled = [CompiledNetwork.from_network(net) for net in nets]
+    networks = NetworkBatch(compiled)
+    assert networks.num_groups > 1
+
+    rng = np.random.default_rng(3)
+    inputs = rng.uniform(-2, 2, (5 * len(nets), config.genome_config.num_inputs))
+    members = rng.integers(len(nets), size=len(inputs))
+    outputs = networks.activate(inputs, members)
+    expected = [nets[m].activate(x) for m, x in zip(members.tolist(), inputs.tolist())]
+    np.testing.assert_allclose(outputs, expected, rtol=0, atol=1e-12)
+
+    for net, network, x in zip(nets, compiled, inputs.tolist()):
+        np.testing.assert_allclose(
+            network.activate(x), net.activate(x), rtol=0, atol=1e-12
+        )
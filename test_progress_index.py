@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from test_ray_sensors import make_track
+
+
+def brute_force(
+    centreline: np.ndarray, arc_length: np.ndarray, points: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    # Arc length and distance of every point projected onto every segment,
+    # shaped (points, segments)
+    starts = centreline[:-1]
+    edges = np.diff(centreline, axis=0)
+    offsets = points[:, None, :] - starts
+    t = np.sum(offsets * edges, axis=2) / np.sum(edges * edges, axis=1)
+    t = np.clip(t, 0.0, 1.0)
+    distances = np.linalg.norm(offsets - t[:, :, None] * edges, axis=2)
+    arcs = arc_length[:-1] + t * np.diff(arc_length)
+    return arcs, distances
+
+
+@pytest.mark.parametrize("seed", [2, 3, 7])
+def test_progress_matches_brute_force(seed: int) -> None:
+    track = make_track(seed)
+    index = track.progress_index()
+    centreline = track.centreline()
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(len(centreline), size=5000)
+    points = centreline[rows] + rng.normal(0, track.track_width / 2, (len(rows), 2))
+
+    arcs, distances = brute_force(centreline, track.arc_length(), points)
+    nearest = np.argmin(distances, axis=1)
+    expected = arcs[np.arange(len(points)), nearest] % index.length
+    np.testing.assert_allclose(
+        index.distance(points), distances.min(axis=1), rtol=0, atol=1e-9
+    )
+    np.testing.assert_allclose(index.progress(points), expected, rtol=0, atol=1e-9)
+
+    # Hinted the way cars are scored, by the next checkpoint along the track,
+    # which must not pull progress towards it away from the nearest point
+    checkpoints = track.checkpoint_arc_lengths()
+    ahead = np.searchsorted(checkpoints, expected, side="right")
+    hints = checkpoints[ahead % len(checkpoints)]
+
+    # Except where another pass over the same spot is on the road too
+    along = np.abs(index.wrap(arcs - expected[:, None]))
+    on_road = distances <= track.track_width / 2
+    crossing = np.any(on_road & (along > np.pi * track.track_width), axis=1)
+    assert crossing.mean() < 0.05
+    hinted = index.progress(points, hints)
+    np.testing.assert_allclose(
+        hinted[~crossing], expected[~crossing], rtol=0, atol=1e-9
+    )
@@ -0,0 +1,89 @@
+import numpy as np
+
+from src.collision.distance_field import DistanceField
+from src.collision.ray_sensors import (
+    BoundarySensor,
+    MarchingSensor,
+    RaySensor,
+    SphereTracingSensor,
+)
+from src.collision.track_mask import TrackMask
+from src.contexts.context import Constants
+from src.tracks.track import Track
+
+
+def on_track_rays(
+    track_mask: TrackMask, num_origins: int, num_rays: int, seed: int
+) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(
+        (0, 0), (track_mask.width, track_mask.height), (20 * num_origins, 2)
+    )
+    origins = points[track_mask.on_track_many(points[:, 0], points[:, 1])]
+    origins = origins[:num_origins]
+    angles = rng.uniform(0, 2 * np.pi, (len(origins), num_rays))
+    return origins, np.stack((np.cos(angles), np.sin(angles)), axis=2)
+
+
+def make_track(seed: int) -> Track:
+    constants = Constants()
+    return Track(
+        constants.WIDTH,
+        constants.HEIGHT,
+        constants.TRACK_CHECKPOINTS,
+        track_width=constants.TRACK_WIDTH,
+        seed=seed,
+    )
+
+
+def test_sphere_tracing_matches_marching() -> None:
+    constants = Constants()
+    track = make_track(7)
+    track_mask = TrackMask.from_track(track, constants.WIDTH, constants.HEIGHT)
+    origins, directions = on_track_rays(track_mask, 2000, 8, seed=0)
+    assert len(origins) == 2000
+
+    marched = MarchingSensor(track_mask).cast(
+        origins, directions, constants.MAX_RAY_LENGTH
+    )
+    traced = SphereTracingSensor(DistanceField(track_mask)).cast(
+        origins, directions, constants.MAX_RAY_LENGTH
+    )
+    np.testing.assert_array_equal(traced, marched)
+
+
+def test_boundary_walls_stay_off_the_road() -> None:
+    # Seeds with tight bends and crossings, where the offset walls fold
+    constants = Constants()
+    for seed in (2, 3):
+        track = make_track(seed)
+        track_mask = TrackMask.from_track(track, constants.WIDTH, constants.HEIGHT)
+        origins, directions = on_track_rays(track_mask, 2000, 8, seed=seed)
+
+        lengths = BoundarySensor(track.boundary_segments()).cast(
+            origins, directions, constants.MAX_RAY_LENGTH
+        )
+        # Walls closer than the first sample read as the first sample
+        hit = (lengths > RaySensor.START_LENGTH) & (lengths < constants.MAX_RAY_LENGTH)
+        hits = (origins[:, None, :] + directions * lengths[..., None])[hit]
+        distances = track.progress_index().distance(hits)
+        assert distances.min() >= track.track_width / 2 - 1 - Track.BOUNDARY_CLIP_STEP
+
+
+def test_boundary_reads_like_marching() -> None:
+    constants = Constants()
+    track = make_track(7)
+    track_mask = TrackMask.from_track(track, constants.WIDTH, constants.HEIGHT)
+    origins, directions = on_track_rays(track_mask, 2000, 8, seed=0)
+
+    marched = MarchingSensor(track_mask).cast(
+        origins, directions, constants.MAX_RAY_LENGTH
+    )
+    exact = BoundarySensor(track.boundary_segments()).cast(
+        origins, directions, constants.MAX_RAY_LENGTH
+    )
+    miss = RaySensor._length_limit(constants.MAX_RAY_LENGTH)
+    assert marched.max() == exact.max() == miss
+    assert exact.min() >= RaySensor.START_LENGTH
+    # Only rays grazing a wall miss it in one and hit it in the other
+    assert np.mean((marched == miss) == (exact == miss)) > 0.95
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import raylib as rl
+
+from src.tracks.track import Track
+from test_ray_sensors import make_track
+
+
+def drawn_piece(controls: list[tuple[int, int]], piece: int) -> np.ndarray:
+    p0, p1, p2, p3 = controls[piece : piece + 4]
+    points = []
+    for t in np.linspace(0.0, 1.0, Track.SPLINE_DIVISIONS + 1).tolist():
+        point = rl.GetSplinePointCatmullRom(p0, p1, p2, p3, t)
+        points.append((point.x, point.y))
+    return np.array(points)
+
+
+@pytest.mark.parametrize("seed", [2, 3, 7])
+def test_length_runs_through_the_nodes_once(seed: int) -> None:
+    track = make_track(seed)
+    nodes = np.array([node.as_tuple() for node in track.edges_to_sorted_nodes()])
+    line = track.centreline()
+    np.testing.assert_array_equal(line[0], nodes[0])
+    np.testing.assert_array_equal(line[-1], nodes[0])
+    assert track.checkpoint_arc_lengths()[0] == 0.0
+
+    # The first and last pieces of the drawn spline both start and end on
+    # the start node, every piece between joins two consecutive nodes
+    controls = track.spline_control_points()
+    pieces = [drawn_piece(controls, i) for i in range(1, len(controls) - 4)]
+    assert len(pieces) == len(nodes) - 1
+    expected = sum(
+        np.linalg.norm(np.diff(piece, axis=0), axis=1).sum() for piece in pieces
+    )
+    assert track.length() == pytest.approx(expected, rel=1e-6)
+    assert track.length() > np.linalg.norm(np.diff(nodes, axis=0), axis=1).sum()